@@ -1,55 +1,225 @@
 # app.py
 import io
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_file, flash
+import csv
+import zlib
+import time
+import uuid
+import click
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, select, insert
+from flask import Flask, Blueprint, current_app, render_template, request, jsonify, session, g, redirect, url_for, flash, Response, stream_with_context
 from models import db, Product, Promotion, Order, OrderItem
 import utils
-from nessa_brain import nessa_reply
+from dbconfig import init_db
+from session_store import init_sessions
+from catalog import get_catalog, pinned_catalog, init_catalog
+from promotions import PromotionTable
+from nessa_brain import nessa_reply, nessa_reply_stream, init_replies, reply_cache, router
+import metrics
+import order_feed
+import sales_stats
+import points
+import browse
+import httpcache
+import applog
 
-# Flask config
-app = Flask(__name__, template_folder="templates", static_folder="static")
-app.config["SECRET_KEY"] = "dev-secret-key-change"  # change in prod or env
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///nestle_smartbot.db"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-db.init_app(app)
+APP_DEFAULTS = {
+    "SECRET_KEY": "dev-secret-key-change",  # change in prod or env
+    "SQLALCHEMY_DATABASE_URI": "sqlite:///nestle_smartbot.db",
+    "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+    "CHAT_BATCH_MAX_MESSAGES": 1000,
+    # create/upgrade the schema and seed an empty database when the app is
+    # created (once across workers, under a file lock). Turn off in
+    # production and run `flask --app app init-db` at deploy time instead.
+    "DB_AUTO_INIT": True,
+    **order_feed.FEED_DEFAULTS,
+}
 
-# seed
-with app.app_context():
-    utils.seed_products_and_promos(app)
+bp = Blueprint("main", __name__, cli_group=None)
+
+def create_app(config=None):
+    """Build a configured app. Does no database work unless DB_AUTO_INIT is set.
+
+    Settings are layered: APP_DEFAULTS, then NESTLE_SMARTBOT_* environment
+    variables (e.g. NESTLE_SMARTBOT_SQLALCHEMY_DATABASE_URI, see also
+    dbconfig.DB_DEFAULTS), then the `config` mapping.
+    """
+    t0 = time.perf_counter()
+    app = Flask(__name__, template_folder="templates", static_folder="static")
+    app.config.update(APP_DEFAULTS)
+    app.config.from_prefixed_env("NESTLE_SMARTBOT")
+    app.config.update(config or {})
+    init_db(app, db)
+    init_sessions(app)
+    init_catalog(app)
+    init_replies(app)
+    points.init_points(app)
+    httpcache.init_http_cache(app)
+    metrics.init_metrics(app, db, router)
+    app.register_blueprint(bp)
+    if app.config["DB_AUTO_INIT"]:
+        utils.init_database(app)
+    app.extensions["nsb_startup_seconds"] = elapsed = time.perf_counter() - t0
+    utils.log(f"app ready in {elapsed * 1000:.1f}ms", startup_ms=round(elapsed * 1000, 1),
+              auto_init=bool(app.config["DB_AUTO_INIT"]))
+    return app
+
+@bp.cli.command("db-upgrade")
+def db_upgrade_command():
+    """Apply pending schema migrations (tables and indexes)."""
+    import migrations
+    applied = migrations.upgrade()
+    print(f"applied migrations: {applied or 'none'}")
+
+@bp.cli.command("init-db")
+def init_db_command():
+    """Apply pending migrations and seed demo data into an empty database."""
+    applied = utils.init_database(current_app, force=True)
+    print(f"applied migrations: {applied or 'none'}")
+
+@bp.cli.command("import-catalog")
+@click.argument("path")
+@click.option("--kind", type=click.Choice(["product", "promotion"]), default="product")
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), default=None,
+              help="default: from the file extension (.csv, .jsonl, optionally .gz)")
+@click.option("--chunk-size", type=int, default=2000, show_default=True)
+@click.option("--max-errors", type=int, default=100, show_default=True)
+@click.option("--dry-run", is_flag=True, help="validate only, write nothing")
+def import_catalog_command(path, kind, fmt, chunk_size, max_errors, dry_run):
+    """Upsert products or promotions from a CSV/JSONL feed, keyed on code."""
+    from catalog_import import import_catalog, RowError
+    t0 = time.perf_counter()
+    try:
+        result = import_catalog(path, kind=kind, fmt=fmt, chunk_size=chunk_size,
+                                dry_run=dry_run, max_errors=max_errors)
+    except RowError as e:
+        raise click.ClickException(str(e))
+    for line_no, message in result.errors:
+        print(f"line {line_no}: {message}")
+    print(f"{result.rows} rows read, {result.upserted} upserted, {len(result.errors)} rejected "
+          f"in {time.perf_counter() - t0:.2f}s{' (dry run)' if dry_run else ''}")
+
+@bp.cli.command("sales-backfill")
+@click.option("--from", "start", help="first day to rebuild (YYYY-MM-DD); default: all history")
+@click.option("--to", "end", help="last day to rebuild (YYYY-MM-DD)")
+@click.option("--chunk-size", type=int, default=sales_stats.BACKFILL_CHUNK_SIZE, show_default=True)
+def sales_backfill_command(start, end, chunk_size):
+    """Rebuild the sales aggregate tables from Order/OrderItem."""
+    days = {}
+    for opt, value in (("from", start), ("to", end)):
+        days[opt] = _parse_day(value)
+        if value and days[opt] is None:
+            raise click.BadParameter(f"expected YYYY-MM-DD, got {value!r}", param_hint=f"--{opt}")
+    t0 = time.perf_counter()
+    chunks = sales_stats.rebuild(start=days["from"], end=days["to"], chunk_size=chunk_size)
+    db.session.commit()
+    print(f"sales aggregates rebuilt in {chunks} chunks, {time.perf_counter() - t0:.2f}s")
+
+@bp.cli.command("points-reconcile")
+@click.option("--fix", is_flag=True, help="rewrite mismatched balances from the ledger")
+def points_reconcile_command(fix):
+    """Check every points balance against the sum of its ledger entries."""
+    bad = points.reconcile(fix=fix)
+    for phone, stored, total in bad:
+        print(f"{phone}: balance {stored}, ledger {total}")
+    print(f"{len(bad)} mismatched balances{' fixed' if fix and bad else ''}")
+
+@bp.before_app_request
+def assign_request_id():
+    g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+
+@bp.after_app_request
+def expose_request_id(resp):
+    resp.headers["X-Request-ID"] = g.get("request_id", "")
+    return resp
 
 # Routes
-@app.route("/")
+@bp.route("/")
+@httpcache.cached_page
 def home():
     return render_template("base.html")
 
-@app.route("/clear_session", methods=["POST"])
+@bp.route("/clear_session", methods=["POST"])
 def clear_session():
-    session.clear()
-    return redirect(url_for("home"))
+    # reset the chat/cart state but keep earned eco-points and the verified phone
+    for key in [k for k in session if k not in ("eco_points", "points_phone")]:
+        session.pop(key)
+    return redirect(url_for("main.home"))
+
+def _search_text(data, field):
+    """A string parameter, None if absent; ValueError on any other JSON type."""
+    v = data.get(field)
+    if v in (None, ""):
+        return None
+    if not isinstance(v, str):
+        raise ValueError(f"{field} must be a string")
+    return v
+
+def _search_int(data, field):
+    """An integer parameter (number or numeric string), None if absent; ValueError otherwise."""
+    v = data.get(field)
+    if v in (None, ""):
+        return None
+    if isinstance(v, bool) or not isinstance(v, (int, str)):
+        raise ValueError(f"{field} must be a whole number")
+    return int(v)
+
+def _search_filters(data):
+    """browse.Filters from request data; ValueError on a malformed value."""
+    cats = data.get("category")
+    if isinstance(cats, str):
+        cats = [c for c in cats.split(",") if c.strip()]
+    elif cats is not None and not (isinstance(cats, list) and all(isinstance(c, str) for c in cats)):
+        raise ValueError("category must be a string or a list of strings")
+    cats = [c.strip().lower() for c in cats] if cats else None
+    return browse.Filters(cats, _search_int(data, "price_min"), _search_int(data, "price_max"),
+                          _search_int(data, "cal_min"), _search_int(data, "cal_max"))
 
-@app.route("/api/search", methods=["POST"])
+@bp.route("/api/search", methods=["GET", "POST"])
+@httpcache.catalog_cached
 def api_search():
-    data = request.json or {}
-    q = data.get("q", "").strip()
-    if not q:
-        return jsonify({"results": []})
+    """Product search and filtered browsing, served from the catalog snapshot.
+
+    Accepts JSON (POST) or query args (GET): q, category (list or comma
+    separated), price_min/price_max, cal_min/cal_max, sort (price, -price,
+    name), limit and cursor. Without q every product is browsable; with q
+    the fuzzy matches are filtered and kept in relevance order unless a sort
+    is given. Facets are per-category counts under the other filters.
+    GET responses carry the catalog version as their ETag.
+    """
+    data = request.get_json(silent=True) or request.args
     try:
-        prods = utils.fuzzy_search_product(q, n=8, cutoff=0.4)
-        results = []
-        for p in prods:
-            results.append({
-                "id": p.id,
-                "code": p.code,
-                "name": p.name,
-                "category": p.category,
-                "price": p.price,
-                "description": p.description
-            })
-        return jsonify({"results": results})
-    except Exception as e:
-        utils.log(f"api_search error: {e}")
-        return jsonify({"results": []})
+        if not hasattr(data, "get"):
+            raise ValueError("request body must be a JSON object")
+        q = (_search_text(data, "q") or "").strip()
+        f = _search_filters(data)
+        limit = min(max(_search_int(data, "limit") or browse.PAGE_SIZE, 1), browse.MAX_PAGE_SIZE)
+        sort = _search_text(data, "sort")
+        if sort is not None and sort not in browse.SORTS:
+            raise ValueError(f"unknown sort {sort!r}")
+        cursor = data.get("cursor")
+        cursor = str(_search_int(data, "cursor")) if isinstance(cursor, int) else _search_text(data, "cursor")
+        catalog = get_catalog()
+        if q:
+            matches = utils.fuzzy_search_product(q, n=browse.MATCH_LIMIT, cutoff=0.4)
+            page = catalog.browse.filter(matches, f, sort, offset=max(int(cursor or 0), 0), limit=limit)
+        else:
+            page = catalog.browse.query(f, sort or browse.DEFAULT_SORT, cursor, limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    results = [{
+        "id": p.id,
+        "code": p.code,
+        "name": p.name,
+        "category": p.category,
+        "price": p.price,
+        "calories": p.calories,
+        "description": p.description
+    } for p in page.items]
+    return jsonify({"results": results, "total": page.total, "facets": {"category": page.facets},
+                    "next_cursor": page.next_cursor})
 
-@app.route("/api/cart/add", methods=["POST"])
+@bp.route("/api/cart/add", methods=["POST"])
 def api_cart_add():
     try:
         data = request.json or {}
@@ -65,25 +235,18 @@ def api_cart_add():
         utils.log(f"api_cart_add error: {e}")
         return jsonify({"ok": False, "error": str(e)}), 400
 
-@app.route("/api/cart/view")
+@bp.route("/api/cart/view")
 def api_cart_view():
     try:
-        cart = session.get("cart", {})
-        items = []
-        subtotal = 0
-        for pid_s, qty in cart.items():
-            pid = int(pid_s)
-            p = Product.query.get(pid)
-            if not p: continue
-            line = p.price * qty
-            subtotal += line
-            items.append({"id": pid, "name": p.name, "qty": qty, "unit_price": p.price, "line_total": line})
+        subtotal, details = utils.compute_subtotal_from_cart(session.get("cart", {}))
+        items = [{"id": d["product"].id, "name": d["product"].name, "qty": d["qty"],
+                  "unit_price": d["product"].price, "line_total": d["line"]} for d in details]
         return jsonify({"items": items, "subtotal": subtotal})
     except Exception as e:
         utils.log(f"api_cart_view error: {e}")
         return jsonify({"items": [], "subtotal": 0})
 
-@app.route("/api/chat", methods=["POST"])
+@bp.route("/api/chat", methods=["POST"])
 def api_chat():
     data = request.json or {}
     msg = (data.get("message") or "").strip()
@@ -95,7 +258,75 @@ def api_chat():
         utils.log(f"api_chat exception: {e}")
         return jsonify({"response": "Terjadi kesalahan pada server saat memproses pesan. Coba lagi."})
 
-@app.route("/api/checkout", methods=["POST"])
+def _sse(event, data):
+    """One server-sent event; multi-line data becomes several data: fields."""
+    return f"event: {event}\n" + "".join(f"data: {line}\n" for line in str(data).split("\n")) + "\n"
+
+@bp.route("/api/chat/stream", methods=["POST"])
+def api_chat_stream():
+    """Server-sent events variant of /api/chat.
+
+    Emits one `line` event per reply chunk (HTML, to be joined with <br/>) and
+    a final `done` event. The first chunk is produced before the response
+    starts, so handlers that change the cart or points are saved as usual.
+    """
+    data = request.get_json(silent=True) or {}
+    msg = (data.get("message") or "").strip()
+    error = "Terjadi kesalahan pada server saat memproses pesan. Coba lagi."
+    chunks = nessa_reply_stream(msg, session)
+    try:
+        first = next(chunks, None)
+    except Exception as e:
+        utils.log(f"api_chat_stream exception: {e}")
+        first, chunks = error, iter(())
+
+    def generate():
+        if first is not None:
+            yield _sse("line", first)
+        try:
+            for chunk in chunks:
+                yield _sse("line", chunk)
+        except Exception as e:
+            utils.log(f"api_chat_stream exception: {e}")
+            yield _sse("line", error)
+        yield _sse("done", "")
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@bp.route("/api/chat/batch", methods=["POST"])
+def api_chat_batch():
+    """Run several messages through nessa_reply in order against one session.
+
+    Body: {"messages": ["halo", "pesan milo 2", ...]}. Cart/points effects apply
+    sequentially, the catalog snapshot is pinned for the whole batch and the
+    session is saved once at the end.
+    """
+    data = request.get_json(silent=True) or {}
+    messages = data.get("messages")
+    if not isinstance(messages, list):
+        return jsonify({"error": "messages harus berupa array"}), 400
+    limit = current_app.config["CHAT_BATCH_MAX_MESSAGES"]
+    if len(messages) > limit:
+        return jsonify({"error": f"maksimal {limit} pesan per batch"}), 413
+    results = []
+    t_batch = time.perf_counter()
+    with pinned_catalog():
+        for raw in messages:
+            msg = (raw if isinstance(raw, str) else "").strip()
+            g.pop("chat_intent", None)
+            t0 = time.perf_counter()
+            try:
+                resp = nessa_reply(msg, session)
+            except Exception as e:
+                utils.log(f"api_chat_batch exception: {e}")
+                resp = "Terjadi kesalahan pada server saat memproses pesan. Coba lagi."
+            results.append({"message": msg, "response": resp, "intent": g.get("chat_intent"),
+                            "ms": round((time.perf_counter() - t0) * 1000, 3)})
+    return jsonify({"responses": results, "count": len(results),
+                    "total_ms": round((time.perf_counter() - t_batch) * 1000, 3)})
+
+@bp.route("/api/checkout", methods=["POST"])
 def api_checkout():
     try:
         data = request.json or {}
@@ -119,23 +350,34 @@ def api_checkout():
 
         pkg = None
         if is_catering:
+            catalog = get_catalog()
             if catering_package_code:
-                pkg = Product.query.filter(Product.code == catering_package_code).first()
+                pkg = catalog.by_code.get(catering_package_code)
             else:
-                pkg = Product.query.filter_by(category="catering").first()
+                pkg = next(iter(catalog.in_category("catering")), None)
             if not pkg:
                 return jsonify({"ok": False, "message": "Tidak ada paket catering tersedia."})
             if pax <= 0:
                 return jsonify({"ok": False, "message": "Untuk catering, tentukan pax (>0)."})
             subtotal = pkg.price * pax
 
-        discount, promo_obj = utils.apply_promotion(subtotal, promo, is_catering=is_catering, pax=pax)
-        tax = utils.compute_tax(subtotal - discount)
         delivery_fee = utils.compute_delivery_fee(subtotal, has_location=bool(address))
+        # points vouchers are per-customer and single use, so they live in the DB, not the rule table
+        voucher = points.voucher_promotion(promo, phone) if promo else None
+        if voucher is not None:
+            promo_res = PromotionTable([voucher]).evaluate(promo, subtotal, is_catering, pax, delivery_fee)
+        else:
+            promo_res = utils.evaluate_promotion(promo, subtotal, is_catering=is_catering, pax=pax,
+                                                 delivery_fee=delivery_fee)
+        promo_obj = promo_res.rule if promo_res else None
+        discount = promo_res.discount if promo_res else 0
+        if promo_res and promo_res.free_shipping:
+            delivery_fee = 0
+        tax = utils.compute_tax(subtotal - discount)
         total = subtotal - discount + tax + delivery_fee
 
         order = Order(
-            order_no=utils.rand_order_no(),
+            order_no=utils.new_order_no(),
             customer_name=name,
             phone=phone,
             address=address,
@@ -150,14 +392,22 @@ def api_checkout():
             promo_code=(promo_obj.code if promo_obj else None),
             status="pending"
         )
+        # order and items commit together: one transaction, one bulk item insert
         db.session.add(order)
+        db.session.flush()
+        if voucher is not None and not points.use_voucher(promo, order.id):
+            db.session.rollback()
+            return jsonify({"ok": False, "message": "Voucher sudah dipakai."})
+        if not is_catering and details:
+            db.session.execute(insert(OrderItem), [
+                {"order_id_fk": order.id, "product_id": it["product"].id,
+                 "quantity": it["qty"], "unit_price": it["product"].price}
+                for it in details
+            ])
+        sales_stats.record_orders([order.id])
         db.session.commit()
 
         if not is_catering:
-            for it in details:
-                oi = OrderItem(order_id_fk=order.id, product_id=it["product"].id, quantity=it["qty"], unit_price=it["product"].price)
-                db.session.add(oi)
-            db.session.commit()
             session["cart"] = {}
             session.modified = True
 
@@ -165,18 +415,19 @@ def api_checkout():
         utils.log(f"New order {order.order_no} by {name}, total={total}")
         return jsonify({"ok": True, "message": msg, "order_no": order.order_no})
     except Exception as e:
+        db.session.rollback()
         utils.log(f"api_checkout error: {e}")
         return jsonify({"ok": False, "message": "Terjadi kesalahan saat checkout."}), 500
 
 # Admin (simple)
 ADMIN_PASSWORD = "admin123"
-@app.route("/admin/login", methods=["GET","POST"])
+@bp.route("/admin/login", methods=["GET","POST"])
 def admin_login():
     if request.method == "POST":
         pw = request.form.get("password","")
         if pw == ADMIN_PASSWORD:
             session["is_admin"] = True
-            return redirect(url_for("admin_orders"))
+            return redirect(url_for("main.admin_orders"))
         flash("Password admin salah.")
     return """
     <html><body>
@@ -193,51 +444,315 @@ def admin_required(func):
     @wraps(func)
     def decorated(*args, **kwargs):
         if not session.get("is_admin"):
-            return redirect(url_for("admin_login"))
+            return redirect(url_for("main.admin_login"))
         return func(*args, **kwargs)
     return decorated
 
-@app.route("/admin/orders")
+ORDER_STATUSES = ["pending", "confirmed", "preparing", "out_for_delivery", "delivered", "cancelled"]
+ADMIN_PAGE_SIZE = 50
+
+def _parse_day(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d") if value else None
+    except ValueError:
+        return None
+
+def order_filters(args):
+    """SQL conditions for the optional status / from / to (YYYY-MM-DD) admin query params."""
+    conds = []
+    status = (args.get("status") or "").strip()
+    if status:
+        conds.append(Order.status == status)
+    start = _parse_day(args.get("from"))
+    end = _parse_day(args.get("to"))
+    if start:
+        conds.append(Order.created_at >= start)
+    if end:
+        conds.append(Order.created_at < end + timedelta(days=1))
+    return conds
+
+def _encode_cursor(order):
+    return f"{order.created_at.isoformat()}_{order.id}"
+
+def _older_than(ts, oid):
+    """Keyset condition: orders after (ts, oid) in (created_at, id) descending order."""
+    return or_(Order.created_at < ts, and_(Order.created_at == ts, Order.id < oid))
+
+def _decode_cursor(cursor):
+    try:
+        ts, oid = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(ts), int(oid)
+    except (AttributeError, ValueError):
+        return None
+
+@bp.route("/admin/orders")
 @admin_required
 def admin_orders():
-    orders = Order.query.order_by(Order.created_at.desc()).all()
-    html = "<h2>Orders</h2><a href='/admin/export'>Export CSV</a><br/><a href='/admin/logout'>Logout</a><hr/>"
-    for o in orders:
-        html += f"<div style='border:1px solid #ddd;padding:8px;margin:8px;'><b>{o.order_no}</b> - {o.customer_name} | Rp{o.total:,} | {o.status} | {o.created_at}<br/>"
-        items = OrderItem.query.filter_by(order_id_fk=o.id).all()
-        if items:
-            html += "<ul>"
-            for it in items:
-                p = Product.query.get(it.product_id)
-                html += f"<li>{p.name} x{it.quantity} = Rp{it.unit_price*it.quantity:,}</li>"
-            html += "</ul>"
-        html += f"<form method='post' action='/admin/update/{o.id}'>"
-        html += "<select name='status'><option>pending</option><option>confirmed</option><option>preparing</option><option>out_for_delivery</option><option>delivered</option><option>cancelled</option></select>"
-        html += "<button type='submit'>Set</button></form></div>"
-    return html
-
-@app.route("/admin/update/<int:order_id>", methods=["POST"])
+    try:
+        limit = min(max(int(request.args.get("limit", ADMIN_PAGE_SIZE)), 1), 200)
+    except ValueError:
+        limit = ADMIN_PAGE_SIZE
+    q = Order.query.filter(*order_filters(request.args))
+    # keyset pagination on (created_at, id) descending: stable and index-friendly
+    after = _decode_cursor(request.args.get("cursor"))
+    if after:
+        q = q.filter(_older_than(*after))
+    orders = q.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1).all()
+    next_cursor = _encode_cursor(orders[limit - 1]) if len(orders) > limit else None
+    orders = orders[:limit]
+
+    # one joined query for every item on the page
+    items = {}
+    if orders:
+        rows = (db.session.query(OrderItem.order_id_fk, Product.name, OrderItem.quantity, OrderItem.unit_price)
+                .outerjoin(Product, Product.id == OrderItem.product_id)
+                .filter(OrderItem.order_id_fk.in_([o.id for o in orders]))
+                .order_by(OrderItem.id)
+                .all())
+        for order_id, name, qty, unit_price in rows:
+            items.setdefault(order_id, []).append(
+                {"name": name or "-", "qty": qty, "line_total": unit_price * qty})
+
+    filters = {k: request.args.get(k, "") for k in ("status", "from", "to")}
+    active = {k: v for k, v in filters.items() if v}
+    next_url = url_for("main.admin_orders", cursor=next_cursor, limit=limit, **active) if next_cursor else None
+    return render_template("admin_orders.html", orders=orders, items=items, filters=filters,
+                           export_url=url_for("main.admin_export", **active),
+                           statuses=ORDER_STATUSES, next_url=next_url,
+                           feed_cursor=order_feed.encode_cursor(order_feed.head_seq()),
+                           feed_wait=current_app.config["ORDER_FEED_MAX_WAIT"] if current_app.config["ORDER_FEED_LONG_POLL"] else 0,
+                           feed_refresh=current_app.config["ORDER_FEED_REFRESH_SECONDS"],
+                           newest_id=max((o.id for o in orders), default=0))
+
+def _order_json(o):
+    return {"id": o.id, "order_no": o.order_no, "customer_name": o.customer_name, "total": o.total,
+            "status": o.status, "is_catering": o.is_catering, "created_at": o.created_at.isoformat(),
+            "updated_at": o.updated_at.isoformat() if o.updated_at else None, "seq": o.change_seq}
+
+@bp.route("/admin/orders/changes")
+@admin_required
+def admin_order_changes():
+    """JSON change feed: orders created or updated after ?since=<cursor>.
+
+    Without `since` only the current cursor is returned, to start following
+    from now. With ?wait=<seconds> (capped by ORDER_FEED_MAX_WAIT) the request
+    long-polls until something changes; it holds a worker while it waits, so
+    `wait` is ignored unless ORDER_FEED_LONG_POLL is on.
+    """
+    cfg = current_app.config
+    since = request.args.get("since")
+    if since is None:
+        return jsonify({"changes": [], "cursor": order_feed.encode_cursor(order_feed.head_seq()), "more": False})
+    pos = order_feed.decode_cursor(since)
+    if pos is None:
+        return jsonify({"error": "cursor tidak valid"}), 400
+    try:
+        wait = min(max(float(request.args.get("wait", 0)), 0), cfg["ORDER_FEED_MAX_WAIT"])
+    except ValueError:
+        wait = 0
+    if not cfg["ORDER_FEED_LONG_POLL"]:
+        wait = 0
+    rows, cursor, more = order_feed.changes_since(*pos, limit=cfg["ORDER_FEED_PAGE_SIZE"])
+    if not rows and wait and order_feed.wait_for_changes(pos[0], wait, cfg["ORDER_FEED_POLL_INTERVAL"]):
+        rows, cursor, more = order_feed.changes_since(*pos, limit=cfg["ORDER_FEED_PAGE_SIZE"])
+    return jsonify({"changes": [_order_json(o) for o in rows], "cursor": cursor, "more": more})
+
+@bp.route("/admin/orders/status", methods=["POST"])
+@admin_required
+def admin_bulk_status():
+    """Set one status on many orders with a single UPDATE: {"ids": [...], "status": "confirmed"}."""
+    data = request.get_json(silent=True) or {}
+    status = data.get("status")
+    ids = data.get("ids")
+    if status not in ORDER_STATUSES:
+        return jsonify({"ok": False, "error": "status tidak dikenal"}), 400
+    if not isinstance(ids, list) or not ids:
+        return jsonify({"ok": False, "error": "ids harus berupa array"}), 400
+    if len(ids) > current_app.config["ORDER_BULK_MAX"]:
+        return jsonify({"ok": False, "error": f"maksimal {current_app.config['ORDER_BULK_MAX']} pesanan"}), 413
+    try:
+        ids = sorted({int(i) for i in ids})
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "ids harus berupa angka"}), 400
+    try:
+        sales_stats.move_status(ids, status)
+        updated, seq = order_feed.bulk_set_status(ids, status)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        utils.log(f"admin_bulk_status error: {e}")
+        return jsonify({"ok": False, "error": "gagal memperbarui status"}), 500
+    utils.log(f"Bulk status {status}: {updated} of {len(ids)} orders", status=status, updated=updated)
+    return jsonify({"ok": True, "updated": updated, "seq": seq})
+
+@bp.route("/admin/update/<int:order_id>", methods=["POST"])
 @admin_required
 def admin_update(order_id):
     status = request.form.get("status")
     o = Order.query.get_or_404(order_id)
+    if status not in ORDER_STATUSES:
+        flash("Status tidak dikenal.")
+        return redirect(url_for("main.admin_orders"))
+    sales_stats.move_status([o.id], status)
     o.status = status
     db.session.commit()
-    return redirect(url_for("admin_orders"))
+    return redirect(url_for("main.admin_orders"))
 
-@app.route("/admin/export")
+@bp.route("/admin/reports/sales")
+@admin_required
+def admin_sales_report():
+    """Sales totals, daily series and top products for ?from=&to= (YYYY-MM-DD, default last 30 days).
+
+    Served from the sales aggregate tables; cancelled orders are left out
+    unless ?status=<s1,s2,...> selects statuses explicitly.
+    """
+    end = _parse_day(request.args.get("to")) or datetime.utcnow()
+    start = _parse_day(request.args.get("from")) or end - timedelta(days=29)
+    if start > end:
+        return jsonify({"error": "tanggal 'from' setelah 'to'"}), 400
+    statuses = [s for s in (request.args.get("status") or "").split(",") if s] or None
+    try:
+        top = min(max(int(request.args.get("top", 10)), 0), 100)
+    except ValueError:
+        top = 10
+    rep = sales_stats.report(start, end, statuses=statuses, top=top)
+    catalog = get_catalog()
+    for row in rep["top_products"]:
+        prod = catalog.get(row["product_id"])
+        row["name"] = prod.name if prod else None
+    return jsonify(rep)
+
+@bp.route("/admin/points/<phone>")
+@admin_required
+def admin_points(phone):
+    """Balance and ledger entries (newest first, ?before=<id> for older) for one customer."""
+    norm = points.normalize_phone(phone)
+    if not norm:
+        return jsonify({"error": "nomor tidak valid"}), 400
+    try:
+        before = int(request.args.get("before") or 0) or None
+    except ValueError:
+        before = None
+    limit = 50
+    entries = points.history(norm, before_id=before, limit=limit)
+    return jsonify({
+        "phone": norm,
+        "balance": points.balance(norm),
+        "entries": [{"id": e.id, "delta": e.delta, "reason": e.reason, "ref": e.ref,
+                     "created_at": e.created_at.isoformat()} for e in entries],
+        "next_before": entries[-1].id if len(entries) == limit else None,
+    })
+
+@bp.route("/admin/cache/stats")
+@admin_required
+def admin_cache_stats():
+    return jsonify({"reply_cache": reply_cache().stats()})
+
+@bp.route("/admin/metrics")
+def admin_metrics():
+    """Prometheus text format; admins, or scrapers sending METRICS_TOKEN as a bearer token."""
+    token = current_app.config.get("METRICS_TOKEN")
+    if not session.get("is_admin") and not (token and request.headers.get("Authorization") == f"Bearer {token}"):
+        return redirect(url_for("main.admin_login"))
+    stats = reply_cache().stats()
+    body = metrics.render(extra_gauges=[
+        ("nsb_reply_cache_hits", "Reply cache hits since start.", stats["hits"]),
+        ("nsb_reply_cache_misses", "Reply cache misses since start.", stats["misses"]),
+        ("nsb_reply_cache_size", "Entries in the reply cache.", stats["size"]),
+        ("nsb_catalog_version", "Catalog version loaded by this worker.", get_catalog().version),
+        ("nsb_log_dropped", "Log records this worker dropped (queue full or write error).",
+         applog.dropped_total()),
+        ("nsb_startup_seconds", "Time create_app() took in this worker.",
+         round(current_app.extensions.get("nsb_startup_seconds", 0.0), 6)),
+    ])
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = [Order.order_no, Order.customer_name, Order.phone, Order.address, Order.is_catering,
+                  Order.pax, Order.subtotal, Order.discount, Order.tax, Order.delivery_fee, Order.total,
+                  Order.promo_code, Order.status, Order.created_at]
+EXPORT_HEADER = ["order_no","name","phone","address","is_catering","pax","subtotal","discount","tax","delivery_fee","total","promo","status","created_at"]
+EXPORT_ITEM_HEADER = ["item_code","item_name","item_qty","item_unit_price","item_line_total"]
+
+def iter_order_batches(conds, batch_size=EXPORT_BATCH_SIZE):
+    """Yield lists of plain order rows (id first), newest first, one keyset page at a time.
+
+    Rows are fetched as tuples rather than ORM objects so nothing accumulates in
+    the session identity map; memory stays at one batch regardless of table size.
+    """
+    after = None
+    while True:
+        stmt = select(Order.id, *EXPORT_COLUMNS).where(*conds)
+        if after:
+            stmt = stmt.where(_older_than(*after))
+        rows = db.session.execute(
+            stmt.order_by(Order.created_at.desc(), Order.id.desc()).limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1].created_at, rows[-1].id)
+
+def _export_items(order_ids):
+    items = {}
+    rows = db.session.execute(
+        select(OrderItem.order_id_fk, Product.code, Product.name, OrderItem.quantity, OrderItem.unit_price)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .where(OrderItem.order_id_fk.in_(order_ids))
+        .order_by(OrderItem.id)
+    ).all()
+    for order_id, code, name, qty, unit_price in rows:
+        items.setdefault(order_id, []).append([code, name, qty, unit_price, unit_price * qty])
+    return items
+
+@bp.route("/admin/export")
 @admin_required
 def admin_export():
-    orders = Order.query.order_by(Order.created_at.desc()).all()
-    si = io.StringIO()
-    cw = __import__("csv").writer(si)
-    cw.writerow(["order_no","name","phone","address","is_catering","pax","subtotal","discount","tax","delivery_fee","total","promo","status","created_at"])
-    for o in orders:
-        cw.writerow([o.order_no,o.customer_name,o.phone,o.address,o.is_catering,o.pax,o.subtotal,o.discount,o.tax,o.delivery_fee,o.total,o.promo_code,o.status,o.created_at])
-    mem = io.BytesIO()
-    mem.write(si.getvalue().encode("utf-8"))
-    mem.seek(0)
-    return send_file(mem, mimetype="text/csv", download_name="orders_export.csv", as_attachment=True)
+    """Stream orders as CSV. Query params: status, from, to, items=1 (one row per
+    OrderItem), gzip=1 (gzip-compressed download)."""
+    conds = order_filters(request.args)
+    with_items = request.args.get("items") == "1"
+    compress = request.args.get("gzip") == "1"
+
+    def generate():
+        buf = io.StringIO()
+        cw = csv.writer(buf)
+        z = zlib.compressobj(wbits=31) if compress else None
+
+        def drain():
+            data = buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+            return z.compress(data) if z else data
+
+        cw.writerow(EXPORT_HEADER + (EXPORT_ITEM_HEADER if with_items else []))
+        yield drain()
+        for rows in iter_order_batches(conds):
+            items = _export_items([r.id for r in rows]) if with_items else {}
+            for r in rows:
+                base = list(r[1:])
+                if not with_items:
+                    cw.writerow(base)
+                    continue
+                for it in items.get(r.id) or [[None] * len(EXPORT_ITEM_HEADER)]:
+                    cw.writerow(base + it)
+            chunk = drain()
+            if chunk:
+                yield chunk
+        if z:
+            yield z.flush()
+
+    filename = "orders_export.csv.gz" if compress else "orders_export.csv"
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/gzip" if compress else "text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+# module-level app for `gunicorn app:app` and `flask --app app`
+app = create_app()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
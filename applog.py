@@ -0,0 +1,177 @@
+# applog.py
+import atexit
+import json
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from flask import g, has_request_context
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: rotation is only coordinated within one process
+    fcntl = None
+
+LOG_MAX_BYTES = int(os.environ.get("NESTLE_SMARTBOT_LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUPS = int(os.environ.get("NESTLE_SMARTBOT_LOG_BACKUPS", 5))
+
+class BatchedLogWriter:
+    """Append JSON log lines to a file from a background thread.
+
+    Callers only enqueue; the writer thread drains the queue in batches and
+    writes each batch with a single O_APPEND write. Records dropped because
+    the queue was full (or a write failed) are counted in `dropped` and
+    reported by a warning record in the next batch that gets written. Size-based rotation runs
+    under an flock on "<path>.lock" and every worker reopens its descriptor
+    when it notices the file was rotated by someone else, so several gunicorn
+    workers can share one log file.
+    """
+
+    def __init__(self, path, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUPS,
+                 flush_interval=0.5, batch_size=500, queue_size=10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._reported = 0  # part of `dropped` already written to the log
+        self._fd = None
+        self._pid = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def emit(self, line):
+        self._ensure_thread()
+        try:
+            self.queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Block until everything enqueued so far has been written."""
+        if self._thread is not None and self._pid == os.getpid():
+            self.queue.join()
+
+    def _ensure_thread(self):
+        # forked workers (gunicorn --preload) inherit no threads: restart per pid
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            self._fd = None
+            self._thread = threading.Thread(target=self._run, name="applog-writer", daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        q = self.queue
+        while True:
+            try:
+                batch = [q.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            lost = self.dropped - self._reported
+            if lost:
+                batch.append(_record("log records dropped", "warning", None,
+                                     {"dropped": lost, "dropped_total": self.dropped}))
+            try:
+                self._write("".join(batch).encode("utf-8"))
+                self._reported += lost
+            except OSError:
+                self.dropped += len(batch) - bool(lost)
+            finally:
+                for _ in range(len(batch) - bool(lost)):
+                    q.task_done()
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", "a") as lf:
+            fcntl.flock(lf, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def _open(self):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _write(self, data):
+        with self._file_lock():
+            try:
+                st = os.stat(self.path)
+                rotated = self._fd is None or os.fstat(self._fd).st_ino != st.st_ino
+            except FileNotFoundError:
+                st, rotated = None, True
+            if rotated:
+                self._open()
+                st = os.fstat(self._fd)
+            if self.max_bytes and st.st_size and st.st_size + len(data) > self.max_bytes:
+                self._rotate()
+            os.write(self._fd, data)
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.truncate(self.path, 0)
+        self._open()
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def get_writer(path=None):
+    path = path or os.environ.get("NESTLE_SMARTBOT_LOG", "nestle_smartbot.log")
+    w = _writers.get(path)
+    if w is None:
+        with _writers_lock:
+            w = _writers.setdefault(path, BatchedLogWriter(path))
+    return w
+
+def request_id():
+    if has_request_context():
+        return g.get("request_id")
+    return None
+
+def _record(msg, level, rid, fields):
+    rec = {
+        "ts": datetime.utcnow().isoformat(sep=" ", timespec="milliseconds"),
+        "level": level,
+        "pid": os.getpid(),
+        "request_id": rid,
+        "msg": str(msg),
+    }
+    rec.update(fields)
+    return json.dumps(rec, ensure_ascii=False, default=str) + "\n"
+
+def log(msg, level="info", **fields):
+    """Queue one structured log record; never blocks on file I/O."""
+    get_writer().emit(_record(msg, level, request_id(), fields))
+
+def dropped_total():
+    """Log records this process has dropped so far, over every writer."""
+    return sum(w.dropped for w in list(_writers.values()))
+
+def flush_all():
+    for w in list(_writers.values()):
+        w.flush()
+
+atexit.register(flush_all)
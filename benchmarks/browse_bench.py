@@ -0,0 +1,81 @@
+# benchmarks/browse_bench.py
+"""Filtered product browsing latency versus catalog size.
+
+Compares BrowseIndex (per-category price-sorted arrays, bisect ranges and
+keyset cursors) against filtering and sorting the whole product list for
+every page, which is what a scan-based /api/search would do.
+
+    python -m benchmarks.browse_bench --sizes 1000 10000 50000
+"""
+import argparse
+import random
+import time
+from catalog import Catalog
+from browse import Filters, SORTS
+from benchmarks.synthetic import synthetic_products
+
+def scan_page(products, f, sort, page, limit):
+    hits = [p for p in products
+            if (f.categories is None or p.category in f.categories)
+            and (f.price_min is None or p.price >= f.price_min)
+            and (f.price_max is None or p.price <= f.price_max)]
+    hits.sort(key=SORTS[sort], reverse=sort == "-price")
+    counts = {}
+    for p in products:
+        if (f.price_min is None or p.price >= f.price_min) and (f.price_max is None or p.price <= f.price_max):
+            counts[p.category] = counts.get(p.category, 0) + 1
+    return hits[page * limit:(page + 1) * limit], counts
+
+def workload(categories, count, seed=7):
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(count):
+        lo = rnd.randint(0, 60000)
+        out.append((Filters(rnd.choice([None, rnd.sample(categories, min(2, len(categories)))]),
+                            lo, lo + rnd.randint(5000, 80000), None, None),
+                    rnd.choice(["price", "-price"])))
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--pages", type=int, default=3, help="pages walked per query")
+    ap.add_argument("--limit", type=int, default=20)
+    args = ap.parse_args()
+
+    print(f"{'size':>8} {'build ms':>10} {'index ms/page':>14} {'scan ms/page':>13} {'same':>6}")
+    for size in args.sizes:
+        products = synthetic_products(size)
+        catalog = Catalog(1, products)
+        t0 = time.perf_counter()
+        idx = catalog.browse
+        build = (time.perf_counter() - t0) * 1000
+        work = workload(idx.categories, args.queries)
+
+        t0 = time.perf_counter()
+        indexed = []
+        for f, sort in work:
+            cursor = None
+            for _ in range(args.pages):
+                page = idx.query(f, sort, cursor, args.limit)
+                indexed.append([p.id for p in page.items])
+                cursor = page.next_cursor
+                if not cursor:
+                    break
+        idx_ms = (time.perf_counter() - t0) * 1000 / len(indexed)
+
+        t0 = time.perf_counter()
+        scanned = []
+        for f, sort in work:
+            for n in range(args.pages):
+                items, _ = scan_page(products, f, sort, n, args.limit)
+                if not items:
+                    break
+                scanned.append([p.id for p in items])
+        scan_ms = (time.perf_counter() - t0) * 1000 / max(len(scanned), 1)
+        same = "yes" if [i for i in indexed if i] == scanned else "NO"
+        print(f"{size:>8} {build:10.1f} {idx_ms:14.3f} {scan_ms:13.3f} {same:>6}")
+
+if __name__ == "__main__":
+    main()
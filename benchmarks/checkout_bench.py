@@ -0,0 +1,91 @@
+# benchmarks/checkout_bench.py
+"""Concurrent checkout throughput against a file-backed SQLite database.
+
+Each thread drives its own test client (own session/cart): add two items,
+then POST /api/checkout. With --compare the run is repeated in fresh
+subprocesses for the old rollback-journal settings and the WAL defaults.
+
+    python -m benchmarks.checkout_bench --threads 8 --orders 50 --compare
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROFILES = {
+    "delete-full": {"SQLITE_JOURNAL_MODE": "DELETE", "SQLITE_SYNCHRONOUS": "FULL"},
+    "wal-normal": {"SQLITE_JOURNAL_MODE": "WAL", "SQLITE_SYNCHRONOUS": "NORMAL"},
+}
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+def run(threads, orders):
+    import app as A  # configured through NESTLE_SMARTBOT_* env vars
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def worker(n):
+        client = A.app.test_client()
+        for i in range(orders):
+            client.post("/api/cart/add", json={"product_id": 1 + (i % 6), "qty": 1})
+            client.post("/api/cart/add", json={"product_id": 2 + (i % 5), "qty": 2})
+            t0 = time.perf_counter()
+            r = client.post("/api/checkout", json={"name": f"bench{n}", "phone": "0800"})
+            dt = (time.perf_counter() - t0) * 1000
+            with lock:
+                latencies.append(dt)
+                if r.status_code != 200 or not r.json.get("ok"):
+                    errors.append(r.status_code)
+
+    ts = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    t0 = time.perf_counter()
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    wall = time.perf_counter() - t0
+    return {
+        "threads": threads,
+        "checkouts": len(latencies),
+        "errors": len(errors),
+        "checkouts_per_s": round(len(latencies) / wall, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--orders", type=int, default=50, help="checkouts per thread")
+    ap.add_argument("--compare", action="store_true", help="run every PROFILES entry in a subprocess")
+    args = ap.parse_args()
+
+    if not args.compare:
+        print(json.dumps(run(args.threads, args.orders)))
+        return
+    for name, settings in PROFILES.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ)
+            env["NESTLE_SMARTBOT_SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            env["NESTLE_SMARTBOT_LOG"] = os.path.join(tmp, "bench.log")
+            env["NESTLE_SMARTBOT_SESSION_SQLITE_PATH"] = os.path.join(tmp, "sessions.db")
+            env.update({f"NESTLE_SMARTBOT_{k}": v for k, v in settings.items()})
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.checkout_bench",
+                 "--threads", str(args.threads), "--orders", str(args.orders)],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout.strip().splitlines()[-1]
+            print(f"{name:<12} {out}")
+
+if __name__ == "__main__":
+    main()
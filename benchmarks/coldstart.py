@@ -0,0 +1,54 @@
+# benchmarks/coldstart.py
+"""Worker cold-start time: importing app.py and building the app in a fresh process.
+
+Each sample is a new interpreter, like a freshly forked or autoscaled worker.
+"fresh db" starts from an empty database (the first worker migrates and
+seeds), "warm db" reuses one that is already initialized, and "no auto-init"
+sets DB_AUTO_INIT=0 as a production deploy running `flask init-db` would.
+
+    python -m benchmarks.coldstart --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = (
+    "import time; t0 = time.perf_counter(); import app; "
+    "print(time.perf_counter() - t0, app.app.extensions['nsb_startup_seconds'])"
+)
+
+def sample(env):
+    out = subprocess.run([sys.executable, "-c", PROBE], env=env, check=True,
+                         capture_output=True, text=True).stdout.split()
+    return float(out[0]) * 1000, float(out[1]) * 1000
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=10)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="nsb-coldstart-")
+    base = {**os.environ,
+            "NESTLE_SMARTBOT_SESSION_SQLITE_PATH": os.path.join(tmp, "sessions.db"),
+            "NESTLE_SMARTBOT_LOG": os.path.join(tmp, "coldstart.log")}
+    warm_db = f"sqlite:///{os.path.join(tmp, 'warm.db')}"
+    sample({**base, "NESTLE_SMARTBOT_SQLALCHEMY_DATABASE_URI": warm_db})  # initialize once
+
+    scenarios = {
+        "fresh db": lambda i: {**base, "NESTLE_SMARTBOT_SQLALCHEMY_DATABASE_URI":
+                               f"sqlite:///{os.path.join(tmp, f'fresh{i}.db')}"},
+        "warm db": lambda i: {**base, "NESTLE_SMARTBOT_SQLALCHEMY_DATABASE_URI": warm_db},
+        "no auto-init": lambda i: {**base, "NESTLE_SMARTBOT_SQLALCHEMY_DATABASE_URI": warm_db,
+                                   "NESTLE_SMARTBOT_DB_AUTO_INIT": "0"},
+    }
+    print(f"{'scenario':<14} {'import ms':>10} {'create_app ms':>14}")
+    for name, env_for in scenarios.items():
+        runs = [sample(env_for(i)) for i in range(args.runs)]
+        print(f"{name:<14} {statistics.median(r[0] for r in runs):10.1f} "
+              f"{statistics.median(r[1] for r in runs):14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/import_bench.py
+"""Bulk catalog import throughput (flask import-catalog) for a synthetic feed.
+
+Writes a CSV or JSONL feed of synthetic products, imports it into a fresh
+database, then re-imports it so every row takes the update path.
+
+    python -m benchmarks.import_bench --size 100000 --format csv
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+from benchmarks.synthetic import synthetic_products
+
+def write_feed(path, fmt, size):
+    rows = [r._asdict() for r in synthetic_products(size)]
+    for r in rows:
+        del r["id"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            w = csv.DictWriter(f, fieldnames=list(rows[0]))
+            w.writeheader()
+            w.writerows(rows)
+        else:
+            for r in rows:
+                f.write(json.dumps(r) + "\n")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--size", type=int, default=100000)
+    ap.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    ap.add_argument("--chunk-size", type=int, default=2000)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="nsb-import-")
+    os.environ.update({
+        "NESTLE_SMARTBOT_SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'import.db')}",
+        "NESTLE_SMARTBOT_SESSION_SQLITE_PATH": os.path.join(tmp, "sessions.db"),
+        "NESTLE_SMARTBOT_LOG": os.path.join(tmp, "import.log"),
+    })
+    from app import app
+    from catalog import get_catalog
+    from catalog_import import import_catalog
+
+    feed = os.path.join(tmp, f"feed.{args.format}")
+    write_feed(feed, args.format, args.size)
+    print(f"{'pass':<10} {'rows':>8} {'seconds':>8} {'rows/s':>10}")
+    with app.app_context():
+        for label in ("insert", "update"):
+            t0 = time.perf_counter()
+            result = import_catalog(feed, chunk_size=args.chunk_size)
+            dt = time.perf_counter() - t0
+            print(f"{label:<10} {result.upserted:8d} {dt:8.2f} {result.upserted / dt:10.0f}")
+        t0 = time.perf_counter()
+        n = len(get_catalog())
+        print(f"catalog snapshot reload: {n} products in {time.perf_counter() - t0:.2f}s")
+
+if __name__ == "__main__":
+    main()
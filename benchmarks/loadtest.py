@@ -0,0 +1,238 @@
+# benchmarks/loadtest.py
+"""Load test for the HTTP API with per-route throughput and latency percentiles.
+
+Seeds a throwaway database with a synthetic catalog and order table, then
+replays a weighted mix of /api/chat, /api/chat/batch (opt-in), /api/search, /api/cart/add,
+/api/cart/view and /api/checkout from concurrent virtual users. Requests go
+through the Flask test client by default, or over HTTP to a local gunicorn
+started for the run (--gunicorn). Results can be written as JSON and compared
+against an earlier run to catch regressions.
+
+    python -m benchmarks.loadtest --users 8 --requests 200 --products 5000 --orders 50000 --json run.json
+    python -m benchmarks.loadtest --gunicorn --workers 4 --baseline run.json
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from benchmarks.intent_bench import CORPUS
+from benchmarks.search_bench import QUERIES
+
+DEFAULT_MIX = "chat=40,search=25,cart_add=20,cart_view=10,checkout=5"
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(ROUTES)
+    if unknown:
+        raise SystemExit(f"unknown routes in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+class TestClientDriver:
+    """In-process requests through app.test_client(); one client per user."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def new_user(self):
+        return self.app.test_client()
+
+    def request(self, user, method, path, payload=None):
+        r = user.open(path, method=method, json=payload)
+        return r.status_code
+
+class HTTPDriver:
+    """Real HTTP against base_url; one cookie jar per user."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def new_user(self):
+        return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, user, method, path, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json"})
+        try:
+            with user.open(req, timeout=30) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+# route name -> (setup or None, method, path, payload factory). `setup` runs
+# unmeasured before the request (checkout needs something in the cart).
+def _cart_add_payload(rnd, n_products):
+    return {"product_id": rnd.randint(1, n_products), "qty": rnd.randint(1, 3)}
+
+ROUTES = {
+    "chat": (None, "POST", "/api/chat", lambda rnd, n: {"message": rnd.choice(CORPUS)}),
+    "chat_batch": (None, "POST", "/api/chat/batch", lambda rnd, n: {"messages": rnd.sample(CORPUS, 20)}),
+    "search": (None, "POST", "/api/search", lambda rnd, n: {"q": rnd.choice(QUERIES)}),
+    "cart_add": (None, "POST", "/api/cart/add", _cart_add_payload),
+    "cart_view": (None, "GET", "/api/cart/view", lambda rnd, n: None),
+    "checkout": ("cart_add", "POST", "/api/checkout",
+                 lambda rnd, n: {"name": "load", "phone": "0800", "promo": rnd.choice(["", "WELCOME10"])}),
+}
+
+def run_load(driver, mix, users, requests_per_user, n_products, seed=0):
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    samples = {n: [] for n in names}
+    errors = {n: 0 for n in names}
+    lock = threading.Lock()
+
+    def user_loop(uid):
+        rnd = random.Random(seed * 1000 + uid)
+        user = driver.new_user()
+        for _ in range(requests_per_user):
+            name = rnd.choices(names, weights)[0]
+            setup, method, path, payload = ROUTES[name]
+            if setup:
+                _, s_method, s_path, s_payload = ROUTES[setup]
+                driver.request(user, s_method, s_path, s_payload(rnd, n_products))
+            t0 = time.perf_counter()
+            status = driver.request(user, method, path, payload(rnd, n_products))
+            dt = (time.perf_counter() - t0) * 1000
+            with lock:
+                samples[name].append(dt)
+                if status >= 400:
+                    errors[name] += 1
+
+    threads = [threading.Thread(target=user_loop, args=(u,)) for u in range(users)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    routes = {}
+    for name in names:
+        lat = samples[name]
+        routes[name] = {
+            "requests": len(lat),
+            "errors": errors[name],
+            "throughput_rps": round(len(lat) / wall, 1),
+            "p50_ms": round(percentile(lat, 50), 3),
+            "p95_ms": round(percentile(lat, 95), 3),
+            "p99_ms": round(percentile(lat, 99), 3),
+        }
+    total = sum(len(v) for v in samples.values())
+    return {"wall_s": round(wall, 3), "total_rps": round(total / wall, 1), "routes": routes}
+
+def compare(current, baseline, tolerance):
+    """Print per-route p95/throughput deltas; return True if any route regressed."""
+    regressed = False
+    print(f"\n{'route':<10} {'p95 base':>9} {'p95 now':>9} {'delta':>8}   {'rps base':>9} {'rps now':>9}")
+    for name, now in current["routes"].items():
+        base = baseline.get("routes", {}).get(name)
+        if not base:
+            continue
+        delta = (now["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        flag = ""
+        if delta > tolerance:
+            flag, regressed = "  REGRESSION", True
+        print(f"{name:<10} {base['p95_ms']:9.2f} {now['p95_ms']:9.2f} {delta:+8.1%}   "
+              f"{base['throughput_rps']:9.1f} {now['throughput_rps']:9.1f}{flag}")
+    return regressed
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit("gunicorn did not start listening in time")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--users", type=int, default=8, help="concurrent virtual users")
+    ap.add_argument("--requests", type=int, default=200, help="requests per user")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted route mix (default {DEFAULT_MIX})")
+    ap.add_argument("--products", type=int, default=1000, help="synthetic products added to the catalog")
+    ap.add_argument("--orders", type=int, default=10000, help="synthetic historical orders")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--gunicorn", action="store_true", help="drive a local gunicorn over HTTP")
+    ap.add_argument("--workers", type=int, default=4, help="gunicorn workers")
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--baseline", help="earlier --json output to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 increase before flagging (0.2 = 20%%)")
+    args = ap.parse_args()
+    mix = parse_mix(args.mix)
+
+    tmp = tempfile.mkdtemp(prefix="nsb-load-")
+    env = {
+        "NESTLE_SMARTBOT_SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'load.db')}",
+        "NESTLE_SMARTBOT_SESSION_SQLITE_PATH": os.path.join(tmp, "sessions.db"),
+        "NESTLE_SMARTBOT_LOG": os.path.join(tmp, "load.log"),
+    }
+    os.environ.update(env)
+    from app import app
+    from models import db
+    from benchmarks.synthetic import seed_large
+
+    with app.app_context():
+        seed_large(db, args.products, args.orders, seed=args.seed + 1)
+    n_products = args.products + 8
+
+    proc = None
+    try:
+        if args.gunicorn:
+            port = _free_port()
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "gunicorn", "-w", str(args.workers), "-b", f"127.0.0.1:{port}",
+                 "--log-level", "warning", "app:app"],
+                env={**os.environ, **env},
+            )
+            _wait_for_port(port)
+            driver = HTTPDriver(f"http://127.0.0.1:{port}")
+        else:
+            driver = TestClientDriver(app)
+        result = run_load(driver, mix, args.users, args.requests, n_products, seed=args.seed)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    result["config"] = {k: getattr(args, k) for k in ("users", "requests", "mix", "products", "orders", "gunicorn", "workers")}
+    print(f"{'route':<10} {'reqs':>6} {'err':>4} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, r in result["routes"].items():
+        print(f"{name:<10} {r['requests']:6d} {r['errors']:4d} {r['throughput_rps']:8.1f} "
+              f"{r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f}")
+    print(f"total {result['total_rps']} req/s over {result['wall_s']}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            if compare(result, json.load(f), args.tolerance):
+                sys.exit(1)
+
+if __name__ == "__main__":
+    main()
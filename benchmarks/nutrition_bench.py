@@ -0,0 +1,37 @@
+# benchmarks/nutrition_bench.py
+"""Nutrition recommendation latency versus catalog size.
+
+    python -m benchmarks.nutrition_bench --sizes 1000 10000 50000
+"""
+import argparse
+import time
+from nutrition import NutritionMatrix, PROFILES, recommend
+from benchmarks.synthetic import synthetic_products
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    requests = [(1, None), (5, None)] + [(30, goal) for goal in PROFILES if goal not in ("infant", "child")]
+    print(f"{'size':>8} {'build ms':>10} {'cold us/req':>12} {'warm us/req':>12}")
+    for size in args.sizes:
+        t0 = time.perf_counter()
+        matrix = NutritionMatrix(synthetic_products(size))
+        build = (time.perf_counter() - t0) * 1000
+        # cold: first request per profile runs the vectorized score pass
+        t0 = time.perf_counter()
+        for age, goal in requests:
+            recommend(matrix, age=age, goal=goal)
+        cold = (time.perf_counter() - t0) / len(requests) * 1e6
+        # warm: memoized per profile until the catalog version changes
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            for age, goal in requests:
+                recommend(matrix, age=age, goal=goal)
+        warm = (time.perf_counter() - t0) / (args.repeat * len(requests)) * 1e6
+        print(f"{size:>8} {build:10.1f} {cold:12.1f} {warm:12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/search_bench.py
+"""Product search latency versus catalog size.
+
+Compares the trigram-indexed search used by fuzzy_search_product against
+the previous full difflib scan over every name and code.
+
+    python -m benchmarks.search_bench --sizes 100 1000 10000 50000
+"""
+import argparse
+import difflib
+import time
+from catalog import Catalog
+from benchmarks.synthetic import synthetic_products
+
+QUERIES = ["milo", "dancow fortigro", "nescafe gold", "cerelak", "bear brand 370ml",
+           "kitkat", "susu", "NESTLE-MILO-000123", "koko krunch madu", "lactogn"]
+
+def legacy_search(products, query, n, cutoff):
+    pool = []
+    for p in products:
+        pool.append((p.name.lower(), p))
+        pool.append((p.code.lower(), p))
+    q = query.lower()
+    names = [t[0] for t in pool]
+    matches = difflib.get_close_matches(q, names, n=n, cutoff=cutoff)
+    seen, results = set(), []
+    for m in matches:
+        for name, prod in pool:
+            if name == m and prod.id not in seen:
+                results.append(prod)
+                seen.add(prod.id)
+    if not results:
+        for name, prod in pool:
+            if q in name and prod.id not in seen:
+                results.append(prod)
+                seen.add(prod.id)
+    return results[:n]
+
+def indexed_search(catalog, query, n, cutoff):
+    q = query.lower()
+    idx = catalog.name_index
+    seen, results = set(), []
+    kids = idx.close_matches(q, n=n, cutoff=cutoff) or idx.substring(q)
+    for kid in kids:
+        for prod in idx.items[kid]:
+            if prod.id not in seen:
+                results.append(prod)
+                seen.add(prod.id)
+    return results[:n]
+
+def timed(fn, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for q in QUERIES:
+            fn(q)
+    return (time.perf_counter() - t0) / (repeat * len(QUERIES)) * 1000
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--n", type=int, default=8)
+    ap.add_argument("--cutoff", type=float, default=0.4)
+    ap.add_argument("--skip-legacy-above", type=int, default=20000,
+                    help="do not time the legacy scan above this size (it takes minutes)")
+    args = ap.parse_args()
+
+    print(f"{'size':>8} {'build ms':>10} {'index ms/q':>11} {'legacy ms/q':>12} {'same top1':>10}")
+    for size in args.sizes:
+        products = synthetic_products(size)
+        t0 = time.perf_counter()
+        catalog = Catalog(1, products)
+        build = (time.perf_counter() - t0) * 1000
+        idx_ms = timed(lambda q: indexed_search(catalog, q, args.n, args.cutoff), args.repeat)
+        if size <= args.skip_legacy_above:
+            leg_ms = timed(lambda q: legacy_search(products, q, args.n, args.cutoff), 1)
+            same = sum(
+                [p.id for p in indexed_search(catalog, q, 1, args.cutoff)]
+                == [p.id for p in legacy_search(products, q, 1, args.cutoff)]
+                for q in QUERIES
+            )
+            legacy, agree = f"{leg_ms:12.2f}", f"{same}/{len(QUERIES)}"
+        else:
+            legacy, agree = f"{'-':>12}", "-"
+        print(f"{size:>8} {build:10.1f} {idx_ms:11.3f} {legacy} {agree:>10}")
+
+if __name__ == "__main__":
+    main()
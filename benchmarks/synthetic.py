@@ -0,0 +1,74 @@
+# benchmarks/synthetic.py
+import random
+from datetime import datetime, timedelta
+from catalog import ProductRecord
+
+BRANDS = ["Milo", "Nescafe", "Dancow", "Cerelac", "Bear Brand", "Nestum", "Kitkat",
+          "Koko Krunch", "Lactogen", "Nestle Pure Life", "Maggi", "Carnation"]
+VARIANTS = ["Active-Go", "Classic", "Gold", "Latte", "Fortigro", "Nutri", "Original",
+            "Coklat", "Vanila", "Stroberi", "Madu", "Less Sugar", "Full Cream", "3+", "1+"]
+SIZES = ["100g", "200g", "250g", "370ml", "400g", "800g", "1kg", "sachet", "box"]
+CATEGORIES = ["beverage", "milk", "baby", "snack", "cereal", "water", "catering"]
+WORDS = ["minuman", "susu", "coklat", "malt", "bergizi", "kopi", "instan", "pertumbuhan",
+         "sereal", "renyah", "gurih", "praktis", "keluarga", "energi", "vitamin"]
+
+def synthetic_products(size, seed=42):
+    """Generate `size` ProductRecord rows with realistic-looking names."""
+    rnd = random.Random(seed)
+    out = []
+    for i in range(1, size + 1):
+        brand = rnd.choice(BRANDS)
+        name = f"{brand} {rnd.choice(VARIANTS)} {rnd.choice(SIZES)}"
+        code = f"NESTLE-{brand.upper().replace(' ', '')}-{i:06d}"
+        cat = rnd.choice(CATEGORIES)
+        cal = None if cat == "catering" else rnd.randint(0, 600)
+        out.append(ProductRecord(
+            id=i, code=code, name=name, category=cat, price=rnd.randint(5, 200) * 1000,
+            calories=cal,
+            protein=None if cal is None else round(rnd.uniform(0, 25), 1),
+            fat=None if cal is None else round(rnd.uniform(0, 30), 1),
+            carbs=None if cal is None else round(rnd.uniform(0, 80), 1),
+            description=" ".join(rnd.sample(WORDS, 3)),
+            is_catering_option=(cat == "catering"),
+        ))
+    return out
+
+def seed_large(db, n_products, n_orders, seed=1):
+    """Bulk-insert synthetic products, orders (spread over the last year) and
+    1-3 items per order into the app database, then ANALYZE."""
+    from sqlalchemy import insert, select
+    from models import Product, Order, OrderItem
+    from utils import new_order_no
+
+    rnd = random.Random(seed)
+    rows = [r._asdict() for r in synthetic_products(n_products, seed=seed)]
+    for r in rows:
+        del r["id"]
+    if rows:
+        db.session.execute(insert(Product), rows)
+    pids = list(db.session.execute(select(Product.id)).scalars())
+    statuses = ["pending", "confirmed", "preparing", "out_for_delivery", "delivered", "cancelled"]
+    now = datetime.utcnow()
+    chunk = 5000
+    for start in range(0, n_orders, chunk):
+        orders = []
+        for _ in range(min(chunk, n_orders - start)):
+            sub = rnd.randint(10, 500) * 1000
+            orders.append({
+                "order_no": new_order_no(), "customer_name": "audit", "phone": f"08{rnd.randint(10**8, 10**9)}",
+                "address": "", "is_catering": False, "subtotal": sub, "discount": 0,
+                "tax": int(sub * 0.11), "delivery_fee": 0, "total": int(sub * 1.11),
+                "status": rnd.choice(statuses),
+                "created_at": now - timedelta(minutes=rnd.randint(0, 60 * 24 * 365)),
+            })
+        db.session.execute(insert(Order), orders)
+    db.session.commit()
+    oids = list(db.session.execute(select(Order.id)).scalars())
+    items = [{"order_id_fk": oid, "product_id": rnd.choice(pids), "quantity": rnd.randint(1, 4),
+              "unit_price": rnd.randint(5, 200) * 1000}
+             for oid in oids for _ in range(rnd.randint(1, 3))]
+    for start in range(0, len(items), chunk):
+        db.session.execute(insert(OrderItem), items[start:start + chunk])
+    db.session.commit()
+    db.session.execute(db.text("ANALYZE"))
+    db.session.commit()
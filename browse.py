@@ -0,0 +1,151 @@
+# browse.py
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from heapq import merge
+from itertools import islice
+
+# Sort orders a browse query accepts; each maps a product to its keyset key.
+SORTS = {
+    "price": lambda p: (p.price, p.id),
+    "-price": lambda p: (p.price, p.id),
+    "name": lambda p: (p.name.lower(), p.id),
+}
+DEFAULT_SORT = "price"
+PAGE_SIZE = 8
+MAX_PAGE_SIZE = 100
+MATCH_LIMIT = 50  # fuzzy text matches considered before filters and paging
+
+Filters = namedtuple("Filters", ["categories", "price_min", "price_max", "cal_min", "cal_max"])
+NO_FILTERS = Filters(None, None, None, None, None)
+
+Page = namedtuple("Page", ["items", "total", "facets", "next_cursor"])
+
+def encode_cursor(key):
+    value, pid = key
+    return f"{value}~{pid}"
+
+def decode_cursor(cursor, sort):
+    """Keyset key for `sort` from a cursor string; ValueError if malformed."""
+    value, sep, pid = (cursor or "").rpartition("~")
+    if not sep:
+        raise ValueError(f"invalid cursor {cursor!r}")
+    return (value if sort == "name" else int(value)), int(pid)
+
+class _Run:
+    """Products of one category in one sort order, with their keys for bisect."""
+
+    def __init__(self, products, key):
+        self.items = sorted(products, key=key)
+        self.keys = [key(p) for p in self.items]
+
+    def __len__(self):
+        return len(self.items)
+
+class BrowseIndex:
+    """Per-category product arrays presorted by price and by name.
+
+    Built once per catalog snapshot. Price ranges and keyset cursors on the
+    price order are bisect lookups on these arrays, several categories are
+    merged lazily, so a filtered page costs O(log n + page size) instead of
+    a catalog scan or a DB query. Category facet counts under a price range
+    are bisect counts too; only a calorie filter has to look at each product
+    in the range.
+    """
+
+    def __init__(self, products):
+        by_cat = {}
+        for p in products:
+            by_cat.setdefault(p.category, []).append(p)
+        self.categories = sorted(by_cat)
+        self.by_price = {c: _Run(ps, SORTS["price"]) for c, ps in by_cat.items()}
+        self.by_name = {c: _Run(ps, SORTS["name"]) for c, ps in by_cat.items()}
+        self.all_by_price = _Run(products, SORTS["price"])
+        self.all_by_name = _Run(products, SORTS["name"])
+
+    def _runs(self, categories, sort):
+        if categories is None:
+            return [self.all_by_name if sort == "name" else self.all_by_price]
+        table = self.by_name if sort == "name" else self.by_price
+        return [table[c] for c in categories if c in table]
+
+    @staticmethod
+    def _price_bounds(run, f):
+        lo = 0 if f.price_min is None else bisect_left(run.keys, (f.price_min,))
+        hi = len(run) if f.price_max is None else bisect_left(run.keys, (f.price_max + 1,))
+        return lo, max(lo, hi)  # price_min above price_max: empty range, not a negative count
+
+    @staticmethod
+    def _calories_ok(p, f):
+        if f.cal_min is None and f.cal_max is None:
+            return True
+        if p.calories is None:
+            return False
+        return (f.cal_min is None or p.calories >= f.cal_min) and (f.cal_max is None or p.calories <= f.cal_max)
+
+    def _matches(self, p, f):
+        if f.price_min is not None and p.price < f.price_min:
+            return False
+        if f.price_max is not None and p.price > f.price_max:
+            return False
+        return self._calories_ok(p, f)
+
+    def _count(self, run, f):
+        lo, hi = self._price_bounds(run, f)
+        if f.cal_min is None and f.cal_max is None:
+            return hi - lo
+        return sum(1 for i in range(lo, hi) if self._calories_ok(run.items[i], f))
+
+    def facets(self, f):
+        """Product count per category under every filter except the category one."""
+        counts = {c: self._count(self.by_price[c], f) for c in self.categories}
+        return {c: n for c, n in counts.items() if n}
+
+    def _stream(self, run, f, sort, after):
+        """Products of one run in `sort` order, strictly after the `after` key."""
+        if sort == "name":
+            lo = 0 if after is None else bisect_right(run.keys, after)
+            return (p for p in islice(run.items, lo, None) if self._matches(p, f))
+        lo, hi = self._price_bounds(run, f)
+        if sort == "-price":
+            if after is not None:
+                hi = min(hi, bisect_left(run.keys, after))
+            seq = (run.items[i] for i in range(hi - 1, lo - 1, -1))
+        else:
+            if after is not None:
+                lo = max(lo, bisect_right(run.keys, after))
+            seq = islice(run.items, lo, hi)
+        return (p for p in seq if self._calories_ok(p, f))
+
+    def query(self, f=NO_FILTERS, sort=DEFAULT_SORT, cursor=None, limit=PAGE_SIZE):
+        """One page of products matching `f` in `sort` order, after `cursor`."""
+        key = SORTS[sort]
+        after = decode_cursor(cursor, sort) if cursor else None
+        runs = self._runs(f.categories, sort)
+        streams = [self._stream(run, f, sort, after) for run in runs]
+        merged = streams[0] if len(streams) == 1 else merge(*streams, key=key, reverse=sort == "-price")
+        items = list(islice(merged, limit + 1)) if streams else []
+        more = len(items) > limit
+        items = items[:limit]
+        facets = self.facets(f)
+        if f.categories is None:
+            total = sum(facets.values())
+        else:
+            total = sum(facets.get(c, 0) for c in set(f.categories))
+        return Page(items, total, facets, encode_cursor(key(items[-1])) if more else None)
+
+    def filter(self, products, f=NO_FILTERS, sort=None, offset=0, limit=PAGE_SIZE):
+        """Page over an explicit candidate list (e.g. text matches), keeping its order unless sorted.
+
+        Text matches are few, so this is a plain pass; cursors are offsets.
+        """
+        hits = [p for p in products if self._matches(p, f)]
+        facets = {}
+        for p in hits:
+            facets[p.category] = facets.get(p.category, 0) + 1
+        if f.categories is not None:
+            hits = [p for p in hits if p.category in f.categories]
+        if sort:
+            hits.sort(key=SORTS[sort], reverse=sort == "-price")
+        page = hits[offset:offset + limit]
+        more = offset + limit < len(hits)
+        return Page(page, len(hits), facets, str(offset + limit) if more else None)
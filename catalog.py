@@ -0,0 +1,180 @@
+# catalog.py
+import threading
+import time
+from datetime import datetime
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import chain
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, select, update, insert
+from flask_sqlalchemy.session import Session as FlaskSession
+from models import db, Product, Promotion, CatalogVersion
+from promotions import PromoRule, PromotionTable
+from search_index import TrigramIndex
+from nutrition import NutritionMatrix
+from browse import BrowseIndex
+
+CATALOG_VERSION_ID = 1
+
+# Immutable product record shared by every request in a worker. Same
+# attribute names as the Product model so callers can use either.
+ProductRecord = namedtuple("ProductRecord", [
+    "id", "code", "name", "category", "price", "calories",
+    "protein", "fat", "carbs", "description", "is_catering_option",
+])
+
+class Catalog:
+    """Read-only snapshot of products and active promotions at one catalog version."""
+
+    def __init__(self, version, products, promotions=(), updated_at=None):
+        self.version = version
+        self.updated_at = updated_at
+        self.promotions = PromotionTable(promotions)
+        self.products = tuple(sorted(products, key=lambda p: p.id))
+        self.by_id = {p.id: p for p in self.products}
+        self.by_code = {p.code: p for p in self.products}
+        self.name_index = TrigramIndex(
+            (key, p) for p in self.products for key in (p.name.lower(), p.code.lower())
+        )
+        self.text_index = TrigramIndex(((p.description or "").lower(), p) for p in self.products)
+        self._nutrition = None
+        self._browse = None
+
+    @property
+    def nutrition(self):
+        # built on first use: only recommendation requests pay for it
+        if self._nutrition is None:
+            self._nutrition = NutritionMatrix(self.products)
+        return self._nutrition
+
+    @property
+    def browse(self):
+        # per-category sorted arrays for /api/search filters, built on first use
+        if self._browse is None:
+            self._browse = BrowseIndex(self.products)
+        return self._browse
+
+    def get(self, pid):
+        try:
+            return self.by_id.get(int(pid))
+        except (TypeError, ValueError):
+            return None
+
+    def in_category(self, *categories):
+        return [p for p in self.products if p.category in categories]
+
+    def __len__(self):
+        return len(self.products)
+
+class CatalogState:
+    """One app's current snapshot and when its version was last checked."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.checked_at = 0.0
+
+def init_catalog(app):
+    app.extensions["nsb_catalog"] = CatalogState()
+
+def _state(app=None):
+    # apps built without init_catalog() (scripts, benchmarks) get one on first use
+    return (app or current_app).extensions.setdefault("nsb_catalog", CatalogState())
+
+def current_version(session=None):
+    session = session or db.session
+    v = session.execute(
+        select(CatalogVersion.version).where(CatalogVersion.id == CATALOG_VERSION_ID)
+    ).scalar()
+    return v or 0
+
+def _load(version):
+    rows = db.session.execute(select(*[getattr(Product, f) for f in ProductRecord._fields])).all()
+    promos = db.session.execute(
+        select(*[getattr(Promotion, f) for f in PromoRule._fields]).where(Promotion.active == True)
+    ).all()
+    updated_at = db.session.execute(
+        select(CatalogVersion.updated_at).where(CatalogVersion.id == CATALOG_VERSION_ID)
+    ).scalar()
+    return Catalog(version, [ProductRecord(*r) for r in rows], [PromoRule(*r) for r in promos], updated_at)
+
+def get_catalog():
+    """Return the current app's catalog snapshot, reloading only when the DB version moved.
+
+    The version row is re-read at most every CATALOG_VERSION_CHECK_SECONDS so
+    hot paths (chat, search) do not pay even the single-row lookup per call.
+    Snapshots are kept per app, so apps on different databases never share one.
+    """
+    if has_app_context():
+        pinned = g.get("pinned_catalog")
+        if pinned is not None:
+            return pinned
+    state = _state()
+    snap = state.snapshot
+    now = time.monotonic()
+    interval = current_app.config.get("CATALOG_VERSION_CHECK_SECONDS", 1.0)
+    if snap is not None and now - state.checked_at < interval:
+        return snap
+    version = current_version()
+    if snap is not None and snap.version == version:
+        state.checked_at = now
+        return snap
+    with state.lock:
+        if state.snapshot is None or state.snapshot.version != version:
+            state.snapshot = _load(version)
+        state.checked_at = now
+        return state.snapshot
+
+@contextmanager
+def pinned_catalog():
+    """Serve one snapshot to every get_catalog() call in the block (app context only).
+
+    Used by batch endpoints so a long run of lookups neither re-checks the
+    version nor sees the catalog change halfway through.
+    """
+    snap = get_catalog()
+    previous = g.get("pinned_catalog")
+    g.pinned_catalog = snap
+    try:
+        yield snap
+    finally:
+        g.pinned_catalog = previous
+
+def invalidate(app=None):
+    """Force the next get_catalog() call of this app (default: current) to re-check the version."""
+    _state(app).checked_at = 0.0
+
+def bump_catalog_version(session=None):
+    """Increment the shared catalog version inside the caller's transaction."""
+    session = session or db.session
+    conn = session.connection()
+    table = CatalogVersion.__table__
+    now = datetime.utcnow()
+    res = conn.execute(
+        update(table).where(table.c.id == CATALOG_VERSION_ID).values(version=table.c.version + 1, updated_at=now)
+    )
+    if res.rowcount == 0:
+        conn.execute(insert(table).values(id=CATALOG_VERSION_ID, version=1, updated_at=now))
+    # remember whose snapshot to invalidate: the app this session belongs to
+    session.info["catalog_changed"] = current_app._get_current_object() if has_app_context() else True
+
+# Any ORM change to Product or Promotion bumps the version once per transaction, so admin
+# edits and seeding invalidate every worker without extra bookkeeping. Only the
+# Flask-SQLAlchemy sessions are watched, and a commit only invalidates the app
+# that made the change.
+@event.listens_for(FlaskSession, "after_flush")
+def _bump_on_product_change(session, flush_context):
+    if session.info.get("catalog_changed"):
+        return
+    if any(isinstance(o, (Product, Promotion)) for o in chain(session.new, session.dirty, session.deleted)):
+        bump_catalog_version(session)
+
+@event.listens_for(FlaskSession, "after_commit")
+def _after_commit(session):
+    app = session.info.pop("catalog_changed", None)
+    if app is not None and app is not True:
+        invalidate(app)
+
+@event.listens_for(FlaskSession, "after_soft_rollback")
+def _after_rollback(session, previous_transaction):
+    session.info.pop("catalog_changed", None)
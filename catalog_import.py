@@ -0,0 +1,218 @@
+# catalog_import.py
+import csv
+import gzip
+import json
+from collections import namedtuple
+from sqlalchemy import select, update, insert
+from sqlalchemy.dialects import sqlite, postgresql
+from models import db, Product, Promotion
+from catalog import bump_catalog_version
+from applog import log
+
+IMPORT_CHUNK_SIZE = 2000
+
+# Upper bounds for per-serving nutrition values; anything above is a unit
+# mistake (kJ for kcal, mg for g) rather than a real product.
+NUTRITION_LIMITS = {"calories": 2000, "protein": 200.0, "fat": 200.0, "carbs": 300.0}
+
+ImportResult = namedtuple("ImportResult", ["rows", "upserted", "errors"])
+
+class RowError(ValueError):
+    pass
+
+def _text(value, field, required=False):
+    value = None if value is None else str(value).strip()
+    if not value:
+        if required:
+            raise RowError(f"{field} is required")
+        return None
+    return value
+
+def _number(value, field, kind, required=False, minimum=0, maximum=None):
+    if value is None or value == "":
+        if required:
+            raise RowError(f"{field} is required")
+        return None
+    try:
+        n = float(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{field} is not a number: {value!r}")
+    if n != n:
+        raise RowError(f"{field} is not a number: {value!r}")
+    if not (minimum <= n and (maximum is None or n <= maximum)):
+        raise RowError(f"{field} out of range {minimum}..{maximum}: {value!r}")
+    if kind is int:
+        if not n.is_integer():
+            raise RowError(f"{field} must be a whole number: {value!r}")
+        n = int(n)
+    return n
+
+def _flag(value, field, default=False):
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    v = str(value).strip().lower()
+    if v in ("1", "true", "yes", "y", "ya"):
+        return True
+    if v in ("0", "false", "no", "n", "tidak"):
+        return False
+    raise RowError(f"{field} is not a boolean: {value!r}")
+
+def product_row(raw):
+    """Validated Product column dict from one parsed record, or RowError."""
+    row = {
+        "code": _text(raw.get("code"), "code", required=True),
+        "name": _text(raw.get("name"), "name", required=True),
+        "category": _text(raw.get("category"), "category", required=True).lower(),
+        "price": _number(raw.get("price"), "price", int, required=True),
+        "description": _text(raw.get("description"), "description"),
+    }
+    for field, limit in NUTRITION_LIMITS.items():
+        row[field] = _number(raw.get(field), field, int if field == "calories" else float, maximum=limit)
+    given = [f for f in NUTRITION_LIMITS if row[f] is not None]
+    if given and len(given) != len(NUTRITION_LIMITS):
+        # the recommender only uses rows with complete nutrition data
+        missing = [f for f in NUTRITION_LIMITS if row[f] is None]
+        raise RowError(f"incomplete nutrition data, missing {', '.join(missing)}")
+    row["is_catering_option"] = _flag(raw.get("is_catering_option"), "is_catering_option",
+                                      default=row["category"] == "catering")
+    return row
+
+def promotion_row(raw):
+    """Validated Promotion column dict from one parsed record, or RowError."""
+    return {
+        "code": _text(raw.get("code"), "code", required=True).upper(),
+        "description": _text(raw.get("description"), "description"),
+        "discount_percent": _number(raw.get("discount_percent"), "discount_percent", float, maximum=100) or 0.0,
+        "min_subtotal": _number(raw.get("min_subtotal"), "min_subtotal", int) or 0,
+        "active": _flag(raw.get("active"), "active", default=True),
+        "catering_only": _flag(raw.get("catering_only"), "catering_only"),
+        "min_pax": _number(raw.get("min_pax"), "min_pax", int),
+        "free_shipping": _flag(raw.get("free_shipping"), "free_shipping"),
+    }
+
+KINDS = {"product": (Product, product_row), "promotion": (Promotion, promotion_row)}
+
+def update_columns(row, raw):
+    """Columns of `row` that an update may overwrite: those the record actually has.
+
+    Missing columns only get their defaults on insert, so a partial feed
+    (e.g. code,name,category,price) leaves the other columns of existing rows
+    alone. Nutrition is all-or-nothing, as the recommender needs all four.
+    """
+    cols = {k for k in row if k in raw and k not in NUTRITION_LIMITS}
+    if all(f in raw for f in NUTRITION_LIMITS) and any(f in row for f in NUTRITION_LIMITS):
+        cols.update(NUTRITION_LIMITS)
+    cols.discard("code")
+    return frozenset(cols)
+
+def _open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8-sig", newline="")
+
+def iter_records(fh, fmt):
+    """Yield (line_no, dict) from an open text file, one record at a time."""
+    if fmt == "csv":
+        reader = csv.DictReader(fh)
+        for rec in reader:
+            yield reader.line_num, rec
+    elif fmt == "jsonl":
+        for line_no, line in enumerate(fh, 1):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError as e:
+                yield line_no, RowError(f"invalid JSON: {e}")
+                continue
+            yield line_no, rec if isinstance(rec, dict) else RowError("JSONL line is not an object")
+    else:
+        raise ValueError(f"unknown format {fmt!r}")
+
+def guess_format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    return "jsonl" if name.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+def _upsert(model, rows, columns):
+    """Insert rows keyed on `code`, or update only `columns` of existing ones.
+
+    One statement where the dialect allows.
+    """
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        ins = (sqlite if dialect == "sqlite" else postgresql).insert(table)
+        if columns:
+            stmt = ins.on_conflict_do_update(
+                index_elements=[table.c.code],
+                set_={k: ins.excluded[k] for k in sorted(columns)},
+            )
+        else:
+            stmt = ins.on_conflict_do_nothing(index_elements=[table.c.code])
+        db.session.execute(stmt, rows)
+        return
+    existing = dict(db.session.execute(
+        select(table.c.code, table.c.id).where(table.c.code.in_([r["code"] for r in rows]))).all())
+    new = [r for r in rows if r["code"] not in existing]
+    old = [{**{k: r[k] for k in columns}, "id": existing[r["code"]]} for r in rows if r["code"] in existing]
+    if new:
+        db.session.execute(insert(model), new)
+    if old and columns:
+        db.session.execute(update(model), old)
+
+def import_catalog(path, kind="product", fmt=None, chunk_size=IMPORT_CHUNK_SIZE, dry_run=False, max_errors=100):
+    """Stream a CSV/JSONL feed into Product or Promotion, upserting on `code`.
+
+    Rows are validated as they are read and written in chunks inside one
+    transaction, which ends with a single catalog version bump so every
+    worker rebuilds its search and nutrition indexes once. Existing rows only
+    get the columns present in the feed (see update_columns). Invalid rows
+    are skipped and reported; more than `max_errors` of them aborts the import.
+    """
+    model, validate = KINDS[kind]
+    fmt = fmt or guess_format(path)
+    errors = []
+    rows = upserted = 0
+    chunk = {}  # code -> (update columns, row); a later duplicate in the same chunk wins
+
+    def flush():
+        nonlocal upserted
+        if chunk and not dry_run:
+            groups = {}  # JSONL records may carry different columns
+            for columns, row in chunk.values():
+                groups.setdefault(columns, []).append(row)
+            for columns, group in groups.items():
+                _upsert(model, group, columns)
+        upserted += len(chunk)
+        chunk.clear()
+
+    try:
+        with _open_text(path) as fh:
+            for line_no, rec in iter_records(fh, fmt):
+                rows += 1
+                try:
+                    if isinstance(rec, Exception):
+                        raise rec
+                    row = validate(rec)
+                except RowError as e:
+                    errors.append((line_no, str(e)))
+                    if len(errors) > max_errors:
+                        raise RowError(f"more than {max_errors} invalid rows, import aborted")
+                    continue
+                chunk[row["code"]] = (update_columns(row, rec), row)
+                if len(chunk) >= chunk_size:
+                    flush()
+            flush()
+        if dry_run or not upserted:
+            db.session.rollback()
+        else:
+            bump_catalog_version(db.session)
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    log(f"Catalog import {path}: {upserted} {kind} rows upserted, {len(errors)} rejected",
+        kind=kind, rows=rows, upserted=upserted, rejected=len(errors), dry_run=dry_run)
+    return ImportResult(rows, upserted, errors)
@@ -0,0 +1,62 @@
+# dbconfig.py
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Defaults; any of these can be overridden in app.config (or through
+# NESTLE_SMARTBOT_<KEY> environment variables, see app.py).
+DB_DEFAULTS = {
+    "SQLITE_JOURNAL_MODE": "WAL",      # concurrent readers while one worker writes
+    "SQLITE_SYNCHRONOUS": "NORMAL",    # fsync at checkpoints, not every commit (safe with WAL)
+    "SQLITE_BUSY_TIMEOUT_MS": 5000,    # wait for the write lock instead of failing
+    "SQLITE_CACHE_SIZE_KB": 16384,
+    "DB_POOL_SIZE": 5,
+    "DB_MAX_OVERFLOW": 10,
+    "DB_POOL_TIMEOUT": 30,
+    "DB_POOL_RECYCLE": 1800,
+}
+
+def _is_memory_sqlite(url):
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS derived from the DB_* settings in config."""
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    opts = {"pool_pre_ping": url.get_backend_name() != "sqlite"}
+    # in-memory SQLite uses a singleton/static pool that takes no sizing args
+    if not _is_memory_sqlite(url):
+        opts.update(
+            pool_size=config["DB_POOL_SIZE"],
+            max_overflow=config["DB_MAX_OVERFLOW"],
+            pool_timeout=config["DB_POOL_TIMEOUT"],
+            pool_recycle=config["DB_POOL_RECYCLE"],
+        )
+    return opts
+
+def sqlite_pragmas(config):
+    return [
+        f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KB'])}",
+    ]
+
+def init_db(app, db):
+    """Apply the engine configuration layer and bind `db` to `app`."""
+    for key, value in DB_DEFAULTS.items():
+        app.config.setdefault(key, value)
+    opts = engine_options(app.config)
+    opts.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = opts
+    db.init_app(app)
+
+    with app.app_context():
+        engine = db.engine
+        if engine.dialect.name == "sqlite":
+            pragmas = sqlite_pragmas(app.config)
+
+            @event.listens_for(engine, "connect")
+            def _set_sqlite_pragmas(dbapi_conn, conn_record):
+                cur = dbapi_conn.cursor()
+                for stmt in pragmas:
+                    cur.execute(stmt)
+                cur.close()
@@ -0,0 +1,216 @@
+# httpcache.py
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, request, make_response, abort, Response
+from werkzeug.security import safe_join
+from catalog import get_catalog
+
+HTTP_CACHE_DEFAULTS = {
+    # catalog-derived GET responses: clients keep them but revalidate every
+    # time, which costs one 304 (no body, no catalog work) until the version moves
+    "HTTP_CATALOG_CACHE_CONTROL": "public, no-cache",
+    "HTTP_PAGE_CACHE_CONTROL": "public, no-cache",
+    # static URLs carry ?v=<content hash>, so they can be cached for long
+    "HTTP_STATIC_MAX_AGE": 31536000,
+    "HTTP_GZIP_MIN_SIZE": 512,  # smaller bodies are not worth compressing
+    # part of every catalog ETag, so a deploy that changes response shapes
+    # invalidates clients' copies; None derives it from the code and templates
+    "HTTP_BUILD_VERSION": None,
+}
+
+def _utc(dt):
+    return dt.replace(tzinfo=timezone.utc, microsecond=0) if dt else None
+
+def _gzip(data):
+    # mtime=0 keeps the output (and so its ETag) identical across workers
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def _accepts_gzip():
+    return "gzip" in request.accept_encodings
+
+def _not_modified(etag, last_modified, cache_control):
+    """A 304 for the current request if its validators match, else None."""
+    inm = request.if_none_match
+    if inm:
+        hit = inm.contains_weak(etag)
+    else:
+        ims = request.if_modified_since
+        hit = bool(ims and last_modified and last_modified <= ims)
+    if not hit:
+        return None
+    resp = Response(status=304)
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = cache_control
+    return resp
+
+class Variant:
+    """An immutable body with its ETag, gzip form (if worth it) and metadata."""
+
+    def __init__(self, data, mimetype, last_modified=None):
+        self.data = data
+        self.mimetype = mimetype
+        self.last_modified = last_modified
+        self.etag = hashlib.sha1(data).hexdigest()[:20]
+        self.gz = None
+        if len(data) >= current_app.config["HTTP_GZIP_MIN_SIZE"]:
+            gz = _gzip(data)
+            if len(gz) < len(data):
+                self.gz = gz
+
+    def response(self, cache_control):
+        gz = self.gz is not None and _accepts_gzip()
+        etag = self.etag + ("-gz" if gz else "")
+        resp = _not_modified(etag, self.last_modified, cache_control)
+        if resp is None:
+            resp = Response(self.gz if gz else self.data, mimetype=self.mimetype)
+            resp.set_etag(etag)
+            resp.last_modified = self.last_modified
+            resp.headers["Cache-Control"] = cache_control
+            if gz:
+                resp.headers["Content-Encoding"] = "gzip"
+        if self.gz is not None:
+            resp.vary.add("Accept-Encoding")
+        return resp
+
+class StaticFiles:
+    """Static assets read and gzip-compressed once, re-read when the file changes."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._files = {}  # filename -> (mtime_ns, size, Variant)
+
+    def get(self, filename):
+        path = safe_join(self.folder, filename)
+        if path is None or not os.path.isfile(path):
+            return None
+        st = os.stat(path)
+        entry = self._files.get(filename)
+        if entry is None or entry[:2] != (st.st_mtime_ns, st.st_size):
+            with open(path, "rb") as fh:
+                data = fh.read()
+            mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            mtime = datetime.fromtimestamp(st.st_mtime, timezone.utc).replace(microsecond=0)
+            entry = (st.st_mtime_ns, st.st_size, Variant(data, mimetype, mtime))
+            with self._lock:
+                self._files[filename] = entry
+        return entry[2]
+
+    def precompress(self):
+        """Load every file under the folder now so no request pays for it."""
+        for root, _, names in os.walk(self.folder):
+            for name in names:
+                self.get(os.path.relpath(os.path.join(root, name), self.folder).replace(os.sep, "/"))
+
+def _static_files():
+    return current_app.extensions["nsb_static"]
+
+def serve_static(filename):
+    """Replacement for Flask's static view: conditional, gzip-aware, long-lived."""
+    variant = _static_files().get(filename)
+    if variant is None:
+        abort(404)
+    max_age = current_app.config["HTTP_STATIC_MAX_AGE"]
+    if request.args.get("v") == variant.etag:
+        cache_control = f"public, max-age={max_age}, immutable"
+    else:
+        cache_control = "public, no-cache"
+    return variant.response(cache_control)
+
+def build_version(app):
+    """Short hash of the app's code, templates and static files."""
+    h = hashlib.sha1()
+    folders = [(app.root_path, False)]
+    if app.template_folder:
+        folders.append((os.path.join(app.root_path, app.template_folder), True))
+    if app.static_folder:
+        folders.append((app.static_folder, True))
+    for folder, recursive in folders:
+        for root, dirs, names in os.walk(folder):
+            dirs.sort()
+            for name in sorted(names):
+                if recursive or name.endswith(".py"):
+                    path = os.path.join(root, name)
+                    h.update(os.path.relpath(path, app.root_path).encode())
+                    with open(path, "rb") as fh:
+                        h.update(fh.read())
+            if not recursive:
+                break
+    return h.hexdigest()[:10]
+
+def cached_page(render):
+    """Cache a view rendered once per catalog version (e.g. the home page).
+
+    Last-Modified is the catalog's updated_at, so every worker sends the
+    same validators for the same page.
+    """
+    lock = threading.Lock()
+    key = f"{render.__module__}.{render.__qualname__}"
+
+    @wraps(render)
+    def view():
+        if current_app.debug:
+            return render()  # templates may be edited while debugging
+        catalog = get_catalog()
+        state = current_app.extensions["nsb_pages"]
+        cached = state.get(key)
+        if cached is None or cached[0] != catalog.version:
+            with lock:
+                cached = state.get(key)
+                if cached is None or cached[0] != catalog.version:
+                    resp = make_response(render())
+                    cached = state[key] = (
+                        catalog.version,
+                        Variant(resp.get_data(), resp.mimetype, _utc(catalog.updated_at)))
+        return cached[1].response(current_app.config["HTTP_PAGE_CACHE_CONTROL"])
+    return view
+
+def catalog_cached(view):
+    """ETag/Last-Modified a GET view from the catalog version; 304 without calling it.
+
+    Only for views whose output depends on nothing but the URL and the
+    catalog. Other methods pass straight through.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return view(*args, **kwargs)
+        catalog = get_catalog()
+        etag = f"catalog-{catalog.version}-{current_app.config['HTTP_BUILD_VERSION']}"
+        modified = _utc(catalog.updated_at)
+        cache_control = current_app.config["HTTP_CATALOG_CACHE_CONTROL"]
+        resp = _not_modified(etag, modified, cache_control)
+        if resp is not None:
+            return resp
+        resp = make_response(view(*args, **kwargs))
+        if resp.status_code == 200:
+            resp.set_etag(etag)
+            resp.last_modified = modified
+            resp.headers["Cache-Control"] = cache_control
+        return resp
+    return wrapper
+
+def init_http_cache(app):
+    """Serve static files through StaticFiles and add ?v=<hash> to static URLs."""
+    for key, value in HTTP_CACHE_DEFAULTS.items():
+        app.config.setdefault(key, value)
+    if not app.config["HTTP_BUILD_VERSION"]:
+        app.config["HTTP_BUILD_VERSION"] = build_version(app)
+    files = StaticFiles(app.static_folder)
+    app.extensions["nsb_static"] = files
+    app.extensions["nsb_pages"] = {}  # cached_page view -> (catalog version, Variant)
+    with app.app_context():
+        files.precompress()
+    app.view_functions["static"] = serve_static
+
+    @app.url_defaults
+    def _static_version(endpoint, values):
+        if endpoint == "static" and "v" not in values:
+            variant = files.get(values.get("filename", ""))
+            if variant is not None:
+                values["v"] = variant.etag
@@ -0,0 +1,154 @@
+# intents.py
+import re
+from markupsafe import Markup
+
+TOKEN_RE = re.compile(r"\w+")
+
+class Intent:
+    def __init__(self, name, handler, exact=(), prefix=(), keywords=(), require_all=(), cacheable=False,
+                 stream=False):
+        self.name = name
+        self.cacheable = cacheable
+        self.stream = stream
+        self.handler = handler
+        self.exact = exact
+        self.prefix = prefix
+        self.keywords = keywords
+        self.require_all = require_all
+
+def _phrase(text):
+    return tuple(TOKEN_RE.findall(text.lower()))
+
+class IntentRouter:
+    """Declarative intent table compiled into hash lookups over message tokens.
+
+    Intents are tried in registration order (earlier wins). Each can match on
+      - exact:       the whole normalized message, e.g. "menu"
+      - prefix:      the leading token(s) followed by at least one more, e.g.
+                     "pesan" in "pesan milo 2" (a bare "pesan" does not match,
+                     like the old startswith("pesan ") check)
+      - keywords:    a whole-word phrase anywhere, e.g. "bear brand"
+      - require_all: every word of a set present anywhere, e.g. {"lapor", "daur"}
+    Intents registered with cacheable=True must not read or write the session;
+    dispatch() then serves their replies from the given cache.
+    Intents registered with stream=True are generators yielding reply lines;
+    dispatch() joins them with <br/>, dispatch_stream() passes them on as they
+    are produced. They may read the session but must not write it (a streamed
+    response has already saved the session when the lines are generated).
+    Matching tokenizes once and looks up every 1..N-token window in a dict, so
+    "hi" no longer fires inside "nutrisi" or "hidup". This is about matching
+    on word boundaries, not speed: at today's intent count it is somewhat
+    slower than the old substring chain (see benchmarks/intent_bench.py).
+    """
+
+    def __init__(self):
+        self.intents = []
+        self.observers = []  # callables(intent_name, cached) notified on every dispatch
+        self._compiled = False
+
+    def intent(self, name, exact=(), prefix=(), keywords=(), require_all=(), cacheable=False, stream=False):
+        def register(handler):
+            self.intents.append(Intent(name, handler, exact, prefix, keywords,
+                                       [frozenset(ws) for ws in require_all], cacheable, stream))
+            self._compiled = False
+            return handler
+        return register
+
+    def compile(self):
+        # phrases are indexed by their first token so a message costs one dict
+        # lookup per token; the rare multi-word phrases are confirmed afterwards
+        self._exact, self._prefix, self._keywords = {}, {}, {}
+        self._require_all = []
+        for rank, it in enumerate(self.intents):
+            for text in it.exact:
+                self._exact.setdefault(" ".join(_phrase(text)), rank)
+            for table, phrases in ((self._prefix, it.prefix), (self._keywords, it.keywords)):
+                for text in phrases:
+                    p = _phrase(text)
+                    table.setdefault(p[0], []).append((rank, p))
+            for words in it.require_all:
+                self._require_all.append((rank, words))
+        self._require_rank = min((r for r, _ in self._require_all), default=None)
+        self._compiled = True
+
+    def match(self, low):
+        """Return the best Intent for an already-lowercased message, or None."""
+        if not self._compiled:
+            self.compile()
+        tokens = TOKEN_RE.findall(low)
+        if not tokens:
+            return None
+        best = self._exact.get(" ".join(tokens), len(self.intents))
+        for rank, p in self._prefix.get(tokens[0], ()):
+            if rank < best and len(tokens) > len(p) and tuple(tokens[:len(p)]) == p:
+                best = rank
+        kw = self._keywords
+        for i, tok in enumerate(tokens):
+            entries = kw.get(tok)
+            if entries:
+                for rank, p in entries:
+                    if rank < best and (len(p) == 1 or tuple(tokens[i:i + len(p)]) == p):
+                        best = rank
+        if self._require_rank is not None and self._require_rank < best:
+            present = set(tokens)
+            for rank, words in self._require_all:
+                if rank < best and words <= present:
+                    best = rank
+        return self.intents[best] if best < len(self.intents) else None
+
+    def _notify(self, name, cached=False):
+        for fn in self.observers:
+            fn(name, cached)
+
+    def _call(self, it, msg, low, session_obj):
+        if it.stream:
+            return Markup("<br/>".join(it.handler(msg, low, session_obj)))
+        return it.handler(msg, low, session_obj)
+
+    def dispatch(self, msg, low, session_obj, fallback, cache=None, generation=None):
+        return self._dispatch(self.match(low), msg, low, session_obj, fallback, cache, generation)
+
+    def _dispatch(self, it, msg, low, session_obj, fallback, cache, generation):
+        if it is None:
+            self._notify("fallback")
+            return fallback(msg, low, session_obj)
+        if cache is None or not it.cacheable:
+            self._notify(it.name)
+            return self._call(it, msg, low, session_obj)
+        # cached replies are a function of the whitespace-normalized message only
+        key = " ".join(msg.split())
+        resp = cache.get(key, generation)
+        self._notify(it.name, cached=resp is not None)
+        if resp is None:
+            resp = self._call(it, key, key.lower(), session_obj)
+            cache.put(key, resp, generation)
+        return resp
+
+    def dispatch_stream(self, msg, low, session_obj, fallback, cache=None, generation=None):
+        """Like dispatch(), but yields the reply in HTML chunks meant to be joined with <br/>.
+
+        Stream intents yield line by line; everything else (including cache
+        hits) comes out as a single chunk. Matching and non-stream handlers run
+        before the first chunk is yielded.
+        """
+        it = self.match(low)
+        if it is None or not it.stream:
+            yield self._dispatch(it, msg, low, session_obj, fallback, cache, generation)
+            return
+        use_cache = cache is not None and it.cacheable
+        if use_cache:
+            msg = " ".join(msg.split())
+            low = msg.lower()
+            resp = cache.get(msg, generation)
+            self._notify(it.name, cached=resp is not None)
+            if resp is not None:
+                yield resp
+                return
+        else:
+            self._notify(it.name)
+        lines = []
+        for line in it.handler(msg, low, session_obj):
+            lines.append(line)
+            yield line
+        if use_cache:
+            cache.put(msg, Markup("<br/>".join(lines)), generation)
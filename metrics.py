@@ -0,0 +1,168 @@
+# metrics.py
+import threading
+import time
+from bisect import bisect_left
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from applog import log
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+METRICS_DEFAULTS = {
+    "METRICS_SLOW_REQUEST_MS": 500,   # log requests slower than this with their SQL; 0 disables
+    "METRICS_SLOW_SQL_LIMIT": 50,     # statements kept per request for the slow log
+    "METRICS_TOKEN": None,            # optional bearer token for scrapers (admins can always read)
+}
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, v in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {v}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, buckets, labels=()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self.series.get(labels)
+            if s is None:
+                s = self.series[labels] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        for labels, s in sorted(self.series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, s):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(names, labels + ('+Inf',))} {s[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {round(s[-2], 6)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {s[-1]}")
+        return lines
+
+request_latency = Histogram("nsb_request_duration_seconds", "HTTP request latency by route.",
+                            LATENCY_BUCKETS, labels=("route", "method"))
+request_total = Counter("nsb_requests_total", "HTTP requests by route and status.",
+                        labels=("route", "method", "status"))
+sql_statements = Histogram("nsb_request_sql_statements", "SQL statements issued per request.",
+                           SQL_COUNT_BUCKETS, labels=("route",))
+sql_seconds = Counter("nsb_sql_seconds_total", "Time spent in SQL by route.", labels=("route",))
+chat_intents = Counter("nsb_chat_intent_total", "nessa_reply dispatches by intent.",
+                       labels=("intent", "cached"))
+slow_requests = Counter("nsb_slow_requests_total", "Requests over METRICS_SLOW_REQUEST_MS.", labels=("route",))
+
+REGISTRY = [request_latency, request_total, sql_statements, sql_seconds, chat_intents, slow_requests]
+
+def record_intent(name, cached):
+    chat_intents.inc(name, "true" if cached else "false")
+    if has_request_context():
+        g.chat_intent = name
+
+def _route():
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+def render(extra_gauges=()):
+    """Prometheus text exposition of every metric (this worker process only)."""
+    lines = []
+    for m in REGISTRY:
+        lines.extend(m.render())
+    for name, help, value in extra_gauges:
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+def init_metrics(app, db, router=None):
+    """Install per-request timing, SQL counting and (optionally) intent tracking."""
+    for key, value in METRICS_DEFAULTS.items():
+        app.config.setdefault(key, value)
+    slow_ms = app.config["METRICS_SLOW_REQUEST_MS"]
+    sql_limit = app.config["METRICS_SLOW_SQL_LIMIT"]
+
+    with app.app_context():
+        engine = db.engine
+
+    # The start time lives on the statement's execution context rather than
+    # on the connection, so a statement that raises leaves nothing behind.
+    @event.listens_for(engine, "before_cursor_execute")
+    def _sql_start(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and has_request_context() and "sql_count" in g:
+            context.nsb_sql_t0 = time.perf_counter()
+
+    def _sql_done(context, statement, failed=False):
+        t0 = getattr(context, "nsb_sql_t0", None)
+        if t0 is None or not has_request_context() or "sql_count" not in g:
+            return
+        context.nsb_sql_t0 = None
+        dt = time.perf_counter() - t0
+        g.sql_count += 1
+        g.sql_time += dt
+        if slow_ms and len(g.sql_log) < sql_limit:
+            g.sql_log.append((round(dt * 1000, 2), ("FAILED " if failed else "") + " ".join(statement.split())))
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _sql_end(conn, cursor, statement, parameters, context, executemany):
+        _sql_done(context, statement)
+
+    @event.listens_for(engine, "handle_error")
+    def _sql_error(exc_ctx):
+        if exc_ctx.execution_context is not None and exc_ctx.statement:
+            _sql_done(exc_ctx.execution_context, exc_ctx.statement, failed=True)
+
+    @app.before_request
+    def _start_timer():
+        g.req_t0 = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+        g.sql_log = []
+
+    @app.after_request
+    def _record(resp):
+        t0 = g.get("req_t0")
+        if t0 is None:
+            return resp
+        elapsed = time.perf_counter() - t0
+        route = _route()
+        request_latency.observe(elapsed, route, request.method)
+        request_total.inc(route, request.method, str(resp.status_code))
+        sql_statements.observe(g.sql_count, route)
+        sql_seconds.inc(route, amount=g.sql_time)
+        if slow_ms and elapsed * 1000 >= slow_ms:
+            slow_requests.inc(route)
+            log(f"slow request {request.method} {route} {elapsed * 1000:.1f}ms",
+                level="warning", route=route, duration_ms=round(elapsed * 1000, 1),
+                sql_count=g.sql_count, sql_ms=round(g.sql_time * 1000, 1),
+                intent=g.get("chat_intent"), sql=g.sql_log)
+        return resp
+
+    if router is not None and record_intent not in router.observers:
+        router.observers.append(record_intent)
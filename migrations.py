@@ -0,0 +1,122 @@
+# migrations.py
+from datetime import datetime
+from sqlalchemy import select, insert, inspect, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.schema import CreateIndex
+from models import db, SchemaMigration
+from applog import log
+import sales_stats
+
+def create_indexes(*names):
+    """Migration step creating the named indexes declared on the models."""
+    def run(conn):
+        wanted = set(names)
+        for table in db.metadata.sorted_tables:
+            for idx in table.indexes:
+                if idx.name in wanted:
+                    conn.execute(CreateIndex(idx, if_not_exists=True))
+                    wanted.discard(idx.name)
+        if wanted:
+            raise RuntimeError(f"unknown indexes: {sorted(wanted)}")
+    return run
+
+def add_columns(table_name, *column_names, backfill=()):
+    """Migration step adding model columns missing from an existing table,
+    then running the given backfill SQL statements."""
+    def run(conn):
+        table = db.metadata.tables[table_name]
+        existing = {c["name"] for c in inspect(conn).get_columns(table_name)}
+        for name in column_names:
+            if name in existing:
+                continue
+            col = table.c[name]
+            ddl = f"ALTER TABLE {conn.dialect.identifier_preparer.quote(table_name)} " \
+                  f"ADD COLUMN {col.name} {col.type.compile(conn.dialect)}"
+            if col.default is not None and col.default.is_scalar:
+                ddl += f" DEFAULT {int(col.default.arg) if isinstance(col.default.arg, bool) else col.default.arg!r}"
+            conn.execute(text(ddl))
+        for stmt in backfill:
+            conn.execute(text(stmt))
+    return run
+
+def create_tables(*names):
+    """Migration step creating the named model tables (and their indexes) if missing."""
+    def run(conn):
+        for name in names:
+            db.metadata.tables[name].create(conn, checkfirst=True)
+    return run
+
+def steps(*runs):
+    """Migration step running several steps in order, in the same transaction."""
+    def run(conn):
+        for step in runs:
+            step(conn)
+    return run
+
+# Append-only list of (version, description, step(connection)). db.create_all
+# only creates missing tables, so anything that changes an existing table
+# (indexes, columns) must be added here to reach databases already in use.
+# New tables need an entry too: init_database() only calls upgrade() when
+# pending() reports something to do.
+MIGRATIONS = [
+    (1, "secondary indexes for admin, export, nutrition and promo queries",
+     create_indexes("ix_product_category", "ix_product_calories", "ix_promotion_code_active",
+                    "ix_order_created_at_id", "ix_order_status_created_at",
+                    "ix_order_item_order_id_fk")),
+    (2, "promotion rule columns (catering_only, min_pax, free_shipping)",
+     add_columns("promotion", "catering_only", "min_pax", "free_shipping", backfill=(
+         "UPDATE promotion SET catering_only = 1, min_pax = 50 WHERE code = 'CATER5'",
+         "UPDATE promotion SET free_shipping = 1 WHERE code = 'FREESHIP50'",
+     ))),
+    (3, "order change feed (order.change_seq, order.updated_at, order_sequence)",
+     steps(add_columns("order", "change_seq", "updated_at", backfill=(
+         'UPDATE "order" SET change_seq = id, updated_at = created_at',
+         'INSERT INTO order_sequence (id, value) SELECT 1, COALESCE(MAX(id), 0) FROM "order" '
+         'WHERE NOT EXISTS (SELECT 1 FROM order_sequence)',
+     )), create_indexes("ix_order_change_seq"))),
+    (4, "sales aggregate tables, built from existing orders",
+     steps(create_tables("sales_daily", "product_sales_daily"), sales_stats.rebuild)),
+    (5, "eco-points ledger and balance tables",
+     create_tables("points_ledger", "points_balance")),
+    (6, "catalog_version.updated_at for HTTP Last-Modified",
+     add_columns("catalog_version", "updated_at", backfill=(
+         "UPDATE catalog_version SET updated_at = CURRENT_TIMESTAMP",
+     ))),
+    (7, "phone verification codes for the points ledger",
+     create_tables("points_otp")),
+    (8, "single-use vouchers minted by points redemptions",
+     create_tables("points_voucher")),
+]
+
+def pending():
+    """Versions in MIGRATIONS not yet recorded in the database (one SELECT)."""
+    try:
+        with db.engine.connect() as conn:
+            applied = set(conn.execute(select(SchemaMigration.version)).scalars())
+    except OperationalError:
+        applied = set()  # no schema_migrations table: fresh or pre-migration database
+    return [version for version, _, _ in MIGRATIONS if version not in applied]
+
+def upgrade():
+    """Create missing tables and apply pending migrations in order. Idempotent.
+
+    Returns the list of versions applied by this call.
+    """
+    db.create_all()
+    with db.engine.connect() as conn:
+        applied = set(conn.execute(select(SchemaMigration.version)).scalars())
+    done = []
+    for version, description, step in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            with db.engine.begin() as conn:
+                step(conn)
+                conn.execute(insert(SchemaMigration.__table__).values(
+                    version=version, description=description, applied_at=datetime.utcnow()))
+        except IntegrityError:
+            # another worker recorded this version first
+            continue
+        done.append(version)
+        log(f"Migration {version} applied: {description}")
+    return done
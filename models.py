@@ -17,6 +17,11 @@ class Product(db.Model):
     description = db.Column(db.String, nullable=True)
     is_catering_option = db.Column(db.Boolean, default=False)
 
+    __table_args__ = (
+        db.Index("ix_product_category", "category"),
+        db.Index("ix_product_calories", "calories"),
+    )
+
 class Promotion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     code = db.Column(db.String, unique=True, nullable=False)
@@ -24,6 +29,13 @@ class Promotion(db.Model):
     discount_percent = db.Column(db.Float, default=0.0)
     min_subtotal = db.Column(db.Integer, default=0)
     active = db.Column(db.Boolean, default=True)
+    catering_only = db.Column(db.Boolean, default=False)
+    min_pax = db.Column(db.Integer, nullable=True)
+    free_shipping = db.Column(db.Boolean, default=False)
+
+    __table_args__ = (
+        db.Index("ix_promotion_code_active", "code", "active"),
+    )
 
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -42,6 +54,22 @@ class Order(db.Model):
     promo_code = db.Column(db.String, nullable=True)
     status = db.Column(db.String, default="pending")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # position in the admin change feed (see order_feed.py); bumped on every write
+    change_seq = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # admin dashboard / export keyset order, with and without a status filter
+        db.Index("ix_order_created_at_id", "created_at", "id"),
+        db.Index("ix_order_status_created_at", "status", "created_at", "id"),
+        db.Index("ix_order_change_seq", "change_seq", "id"),
+    )
+
+# Single-row counter handing out Order.change_seq values; incrementing it takes
+# the row's write lock, so sequence order matches commit order.
+class OrderSequence(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
 
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -49,3 +77,83 @@ class OrderItem(db.Model):
     product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=1)
     unit_price = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_order_item_order_id_fk", "order_id_fk"),
+    )
+
+# Sales aggregates kept up to date by checkout and status changes (see
+# sales_stats.py). `day` is the UTC order date as YYYY-MM-DD.
+class SalesDaily(db.Model):
+    day = db.Column(db.String(10), primary_key=True)
+    status = db.Column(db.String, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    subtotal = db.Column(db.Integer, nullable=False, default=0)
+    discount = db.Column(db.Integer, nullable=False, default=0)
+    tax = db.Column(db.Integer, nullable=False, default=0)
+    delivery_fee = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Integer, nullable=False, default=0)
+    catering_orders = db.Column(db.Integer, nullable=False, default=0)
+    catering_pax = db.Column(db.Integer, nullable=False, default=0)
+
+class ProductSalesDaily(db.Model):
+    day = db.Column(db.String(10), primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String, primary_key=True)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Integer, nullable=False, default=0)
+
+# Eco-points: append-only ledger per customer phone, plus the running balance
+# kept in step with it (see points.py) so lookups never sum the history.
+class PointsLedger(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    phone = db.Column(db.String, nullable=False)
+    delta = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String, nullable=False)
+    ref = db.Column(db.String, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_points_ledger_phone_id", "phone", "id"),
+    )
+
+class PointsBalance(db.Model):
+    phone = db.Column(db.String, primary_key=True)
+    balance = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Single-use checkout code minted by a points redemption; used_at/order_id are
+# set in the checkout transaction that consumes it.
+class PointsVoucher(db.Model):
+    code = db.Column(db.String, primary_key=True)
+    phone = db.Column(db.String, nullable=False)
+    reward = db.Column(db.String, nullable=False)
+    ledger_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    used_at = db.Column(db.DateTime, nullable=True)
+    order_id = db.Column(db.Integer, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_points_voucher_phone", "phone"),
+    )
+
+# Pending phone verification for the points ledger: one row per phone, so
+# attempt and resend limits hold across sessions and workers.
+class PointsOtp(db.Model):
+    phone = db.Column(db.String, primary_key=True)
+    code_hash = db.Column(db.String, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=False)
+    tries = db.Column(db.Integer, nullable=False, default=0)
+
+class SchemaMigration(db.Model):
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String, nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Single-row counter bumped whenever the product catalog changes; workers
+# compare it against their in-memory snapshot (see catalog.py).
+class CatalogVersion(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime)  # when `version` last moved; HTTP Last-Modified
@@ -1,7 +1,23 @@
 # nessa_brain.py
+import re
 from markupsafe import Markup
-from models import Product
-from utils import fuzzy_search_product, nutrition_advice, log
+from utils import fuzzy_search_product, nutrition_advice, compute_subtotal_from_cart, log
+from flask import current_app
+from catalog import get_catalog
+from intents import IntentRouter
+from cache import TTLCache
+import points
+import browse
+
+router = IntentRouter()
+
+def init_replies(app):
+    # session-independent replies, dropped whenever the catalog version changes;
+    # one cache per app, like the catalog snapshot they are built from
+    app.extensions["nsb_reply_cache"] = TTLCache(maxsize=2048, ttl=600)
+
+def reply_cache():
+    return current_app.extensions["nsb_reply_cache"]
 
 def format_money(x):
     try:
@@ -9,6 +25,11 @@ def format_money(x):
     except:
         return str(x)
 
+def _rest(msg):
+    """Text after the leading command word ('produk milo' -> 'milo')."""
+    parts = re.split(r"\W+", msg.strip(), maxsplit=1)
+    return parts[1] if len(parts) > 1 else ""
+
 def nessa_reply(raw_msg: str, session_obj) -> str:
     """
     raw_msg: raw user message string
@@ -18,197 +39,283 @@ def nessa_reply(raw_msg: str, session_obj) -> str:
     msg = (raw_msg or "").strip()
     if not msg:
         return "Nessa: Ketik sesuatu ya 😊"
+    low = msg.lower().strip()
+    return router.dispatch(msg, low, session_obj, fallback=reply_fallback,
+                           cache=reply_cache(), generation=get_catalog().version)
 
+def nessa_reply_stream(raw_msg: str, session_obj):
+    """Generator version of nessa_reply: yields HTML chunks to be joined with <br/>."""
+    msg = (raw_msg or "").strip()
+    if not msg:
+        yield "Nessa: Ketik sesuatu ya 😊"
+        return
     low = msg.lower().strip()
+    yield from router.dispatch_stream(msg, low, session_obj, fallback=reply_fallback,
+                                      cache=reply_cache(), generation=get_catalog().version)
+
+# Intent table. Earlier entries win, so explicit commands ("pesan milo 2",
+# "resep milo") take precedence over the product keyword blurbs. Commands need
+# an argument: a bare "resep" or "pesan" still goes to the fallback. Multi-line
+# listings are stream intents: generators yielding one line at a time.
 
-    # greet variations
-    if any(k in low for k in ("halo", "hai", "hi", "selamat")):
-        return ("Nessa 🤖: Halo! Aku Nessa — asisten virtual Nestlé. "
-                "Ketik 'bantuan' untuk melihat perintah yang tersedia.")
-
-    # help
-    if any(k in low for k in ("bantuan", "help", "perintah")):
-        help_text = (
-            "Nessa 🤖 — Perintah yang tersedia:\n"
-            "- menu / produk : lihat katalog singkat\n"
-            "- produk <nama> : info produk (contoh: 'produk milo')\n"
-            "- resep <produk> : ide resep sederhana (contoh: 'resep milo')\n"
-            "- rekomendasi gizi usia <usia> <tujuan> : contoh 'rekomendasi gizi usia 30 weight_loss'\n"
-            "- pesan <produk> <qty> : tambah ke keranjang (contoh: 'pesan milo 2')\n"
-            "- keranjang : lihat isi keranjang\n"
-            "- checkout : selesaikan pembelian (akan meminta nama/telepon)\n"
-            "- lapor daur ulang <jumlah> <produk> : dapatkan eco-poin\n"
-            "- poin saya : lihat poin daur ulang\n"
-            "- tukar poin : lihat reward yang bisa ditukar\n"
+# menu / katalog [kategori]
+@router.intent("menu", exact=("menu", "produk", "katalog"), prefix=("menu", "katalog"),
+               cacheable=True, stream=True)
+def reply_menu(msg, low, session_obj):
+    idx = get_catalog().browse
+    cat = _rest(msg).lower()
+    if cat in idx.categories:
+        page = idx.query(browse.Filters([cat], None, None, None, None))
+        yield f"Nessa 🤖: Produk kategori {cat} ({page.total}), termurah dulu:"
+    else:
+        page = idx.query()
+        yield "Nessa 🤖: Berikut beberapa produk kami, termurah dulu:"
+    for p in page.items:
+        yield f"- {p.name} ({p.category}) — {format_money(p.price)}"
+    yield "Kategori: " + ", ".join(f"{c} ({n})" for c, n in page.facets.items())
+    yield "Ketik 'menu <kategori>' atau 'produk <nama>' untuk info detil."
+
+# product info
+@router.intent("product_info", prefix=("produk", "product"), cacheable=True, stream=True)
+def reply_product_info(msg, low, session_obj):
+    q = _rest(msg)
+    found = fuzzy_search_product(q, n=6, cutoff=0.3)
+    if not found:
+        yield f"Nessa 🤖: Maaf, tidak menemukan produk mirip '{q}'."
+        return
+    yield f"Nessa 🤖: Ditemukan {len(found)} produk:"
+    for p in found:
+        cal = f"{p.calories} kkal" if p.calories else "—"
+        yield f"- {p.name} — {p.description or '-'} — {format_money(p.price)} — {cal}"
+
+# resep <produk>
+@router.intent("recipe", prefix=("resep",), cacheable=True)
+def reply_recipe(msg, low, session_obj):
+    q = _rest(msg).lower()
+    # simple recipe generator using product keywords
+    if "milo" in q:
+        return Markup(
+            "Nessa 🤖: Resep sederhana - Milo Oat Bowl:\n"
+            "- 2 sdm Milo + 1/2 cup oat + 200ml susu hangat\n"
+            "- Aduk, tambahkan potongan pisang dan madu jika suka.\n"
+            "Cocok untuk sarapan cepat."
         )
-        return Markup(help_text)
-
-    # menu / katalog
-    if low in ("menu", "produk", "katalog"):
-        prods = Product.query.limit(8).all()
-        lines = ["Nessa 🤖: Berikut beberapa produk kami:"]
-        for p in prods:
-            lines.append(f"- {p.name} ({p.category}) — {format_money(p.price)}")
-        lines.append("Ketik 'produk <nama>' untuk info detil.")
-        return Markup("<br/>".join(lines))
-
-    # product info
-    if low.startswith("produk ") or low.startswith("product "):
-        q = msg.split(" ", 1)[1]
-        found = fuzzy_search_product(q, n=6, cutoff=0.3)
-        if not found:
-            return f"Nessa 🤖: Maaf, tidak menemukan produk mirip '{q}'."
-        lines = [f"Nessa 🤖: Ditemukan {len(found)} produk:"]
-        for p in found:
-            cal = f"{p.calories} kkal" if p.calories else "—"
-            lines.append(f"- {p.name} — {p.description or '-'} — {format_money(p.price)} — {cal}")
-        return Markup("<br/>".join(lines))
-
-    # specific short product keywords (Nescafe etc)
-    if "nescafe" in low:
+    if "dancow" in q:
         return Markup(
-            "Nessa 🤖: ☕ *Nescafé* — kopi instan dari biji pilihan.\n"
-            "- *Classic*: rasa kuat & pekat.\n"
-            "- *Gold*: aroma halus, cita rasa premium.\n"
-            "- *Latte*: creamy, nikmat dengan susu.\n"
-            "Ketik 'produk Nescafé' atau 'pesan Nescafé 1' untuk menambahkan ke keranjang."
+            "Nessa 🤖: Resep - Smoothie Dancow:\n"
+            "- 2 sdm Dancow + 1 pisang + 150ml susu + es\n"
+            "- Blender sampai halus, sajikan."
         )
+    return "Nessa 🤖: Maaf, belum ada resep spesifik untuk produk itu. Coba 'resep milo' atau 'resep dancow'."
 
-    if "milo" in low:
-        return ("Nessa 🤖: Milo Active-Go cocok untuk aktivitas dan pertumbuhan anak; "
-                "mengandung karbohidrat & protein untuk energi.")
-
-    if "dancow" in low:
-        return ("Nessa 🤖: Dancow Fortigro diformulasikan untuk membantu tumbuh kembang anak "
-                "dengan vitamin & mineral esensial.")
-
-    if "cerelac" in low:
-        return ("Nessa 🤖: Cerelac membantu pemberian MPASI dengan kandungan zat besi & vitamin.")
-
-    if "bear brand" in low or "bearbrand" in low:
-        return ("Nessa 🤖: Bear Brand susu steril yang membantu menjaga daya tahan tubuh.")
-
-    # resep <produk>
-    if low.startswith("resep "):
-        q = msg.split(" ", 1)[1].lower()
-        # simple recipe generator using product keywords
-        if "milo" in q:
-            return Markup(
-                "Nessa 🤖: Resep sederhana - Milo Oat Bowl:\n"
-                "- 2 sdm Milo + 1/2 cup oat + 200ml susu hangat\n"
-                "- Aduk, tambahkan potongan pisang dan madu jika suka.\n"
-                "Cocok untuk sarapan cepat."
-            )
-        if "dancow" in q:
-            return Markup(
-                "Nessa 🤖: Resep - Smoothie Dancow:\n"
-                "- 2 sdm Dancow + 1 pisang + 150ml susu + es\n"
-                "- Blender sampai halus, sajikan."
-            )
-        return "Nessa 🤖: Maaf, belum ada resep spesifik untuk produk itu. Coba 'resep milo' atau 'resep dancow'."
-
-    # rekomendasi gizi usia X goal
-    if "rekomendasi gizi" in low or "nutrition" in low:
-        parts = low.split()
-        age = None
-        goal = None
-        for t in parts:
-            if t.isdigit():
-                age = int(t)
-            if t in ("weight_loss","weight_gain","weightgain","maintenance","lactating","pregnant","child_growth"):
-                goal = t
-        advice, recs = nutrition_advice(age=age, goal=goal)
-        lines = []
-        if advice:
-            lines.append("Nessa 🤖: " + advice)
-        if recs:
-            lines.append("Produk rekomendasi:")
-            for r in recs:
-                lines.append(f"- {r.name} — Rp{r.price:,}")
-        if not lines:
-            return "Nessa 🤖: Coba format: 'rekomendasi gizi usia 30 weight_loss'"
-        return Markup("<br/>".join(lines))
-
-    # order flow in chat: pesan <produk> <qty>
-    if low.startswith("pesan ") or low.startswith("order "):
-        parts = msg.split()
-        try:
-            qty = 1
-            if parts[-1].isdigit():
-                qty = int(parts[-1])
-                name_part = " ".join(parts[1:-1])
-            else:
-                name_part = " ".join(parts[1:])
-            prods = fuzzy_search_product(name_part, n=1, cutoff=0.3)
-            if not prods:
-                return f"Nessa 🤖: Produk '{name_part}' tidak ditemukan."
-            p = prods[0]
-            cart = session_obj.get("cart", {})
-            cart[str(p.id)] = cart.get(str(p.id), 0) + qty
-            session_obj["cart"] = cart
-            session_obj.modified = True
-            subtotal = sum([Product.query.get(int(k)).price * v for k, v in cart.items()])
-            return f"Nessa 🤖: {qty} x {p.name} ditambahkan ke keranjang. Subtotal saat ini: Rp{subtotal:,}"
-        except Exception as e:
-            log(f"nessa order error: {e}")
-            return "Nessa 🤖: Gagal memproses pesanan. Gunakan format: 'pesan Milo 2'."
-
-    # cart viewing
-    if "keranjang" in low or "cart" in low:
-        cart = session_obj.get("cart", {})
-        if not cart:
-            return "Nessa 🤖: Keranjang Anda kosong 🛒"
-        lines = ["Nessa 🤖: Isi keranjang:"]
-        subtotal = 0
-        for pid_s, qty in cart.items():
-            p = Product.query.get(int(pid_s))
-            if not p: continue
-            line = p.price * qty
-            subtotal += line
-            lines.append(f"- {p.name} x{qty} = Rp{line:,}")
-        lines.append(f"Total: Rp{subtotal:,}")
-        return Markup("<br/>".join(lines))
-
-    # eco point: lapor daur ulang <jumlah> <produk>
-    if low.startswith("lapor daur ulang") or low.startswith("lapor daurulang") or ("daur" in low and "lapor" in low):
-        # parse number and product
-        tokens = low.split()
-        number = None
-        product_name = None
-        for t in tokens:
-            if t.isdigit():
-                number = int(t)
-                break
-        # naive product find: last token(s)
-        if number:
-            # product substring after number
-            idx = tokens.index(str(number))
-            product_name = " ".join(tokens[idx+1:]) if idx+1 < len(tokens) else ""
+# rekomendasi gizi usia X goal
+@router.intent("nutrition", keywords=("rekomendasi gizi", "nutrition"), cacheable=True, stream=True)
+def reply_nutrition(msg, low, session_obj):
+    parts = low.split()
+    age = None
+    goal = None
+    for t in parts:
+        if t.isdigit():
+            age = int(t)
+        if t in ("weight_loss","weight_gain","weightgain","maintenance","lactating","pregnant","child_growth"):
+            goal = t
+    advice, recs = nutrition_advice(age=age, goal=goal)
+    if not advice and not recs:
+        yield "Nessa 🤖: Coba format: 'rekomendasi gizi usia 30 weight_loss'"
+        return
+    if advice:
+        yield "Nessa 🤖: " + advice
+    if recs:
+        yield "Produk rekomendasi:"
+        for r in recs:
+            yield f"- {r.name} — Rp{r.price:,}"
+
+# order flow in chat: pesan <produk> <qty>
+@router.intent("order", prefix=("pesan", "order"))
+def reply_order(msg, low, session_obj):
+    parts = msg.split()
+    try:
+        qty = 1
+        if parts[-1].isdigit():
+            qty = int(parts[-1])
+            name_part = " ".join(parts[1:-1])
         else:
-            # try find last token as product
-            product_name = tokens[-1]
-        pts = (number or 1) * 10
-        points = session_obj.get("eco_points", 0) + pts
-        session_obj["eco_points"] = points
+            name_part = " ".join(parts[1:])
+        prods = fuzzy_search_product(name_part, n=1, cutoff=0.3)
+        if not prods:
+            return f"Nessa 🤖: Produk '{name_part}' tidak ditemukan."
+        p = prods[0]
+        cart = session_obj.get("cart", {})
+        cart[str(p.id)] = cart.get(str(p.id), 0) + qty
+        session_obj["cart"] = cart
         session_obj.modified = True
-        return f"Nessa 🤖: Terima kasih! Laporan diterima. Anda mendapatkan {pts} poin. Total poin sekarang: {points}."
-
-    if "poin saya" in low or "poin" == low:
-        pts = session_obj.get("eco_points", 0)
-        return f"Nessa 🤖: Poin daur ulang Anda: {pts}."
-
-    if "tukar poin" in low:
-        pts = session_obj.get("eco_points", 0)
-        rewards = []
-        if pts >= 500:
-            rewards.append("Voucher diskon 20%")
-        if pts >= 200:
-            rewards.append("Voucher gratis ongkir 50k")
-        if not rewards:
+        subtotal, _ = compute_subtotal_from_cart(cart)
+        return f"Nessa 🤖: {qty} x {p.name} ditambahkan ke keranjang. Subtotal saat ini: Rp{subtotal:,}"
+    except Exception as e:
+        log(f"nessa order error: {e}")
+        return "Nessa 🤖: Gagal memproses pesanan. Gunakan format: 'pesan Milo 2'."
+
+# eco point: lapor daur ulang <jumlah> <produk>
+@router.intent("recycle", prefix=("lapor daur ulang", "lapor daurulang"),
+               require_all=({"lapor", "daur"}, {"lapor", "daurulang"}))
+def reply_recycle(msg, low, session_obj):
+    # parse number and product
+    tokens = low.split()
+    number = None
+    product_name = None
+    for t in tokens:
+        if t.isdigit():
+            number = int(t)
+            break
+    # naive product find: last token(s)
+    if number:
+        # product substring after number
+        idx = tokens.index(str(number))
+        product_name = " ".join(tokens[idx+1:]) if idx+1 < len(tokens) else ""
+    else:
+        # try find last token as product
+        product_name = tokens[-1]
+    pts = (number or 1) * 10
+    phone = points.session_phone(session_obj)
+    if phone:
+        points.earn(phone, pts, "recycle", ref=product_name or None)
+        total = points.balance(phone)
+        return f"Nessa 🤖: Terima kasih! Laporan diterima. Anda mendapatkan {pts} poin. Total poin sekarang: {total}."
+    total = session_obj.get("eco_points", 0) + pts
+    session_obj["eco_points"] = total
+    session_obj.modified = True
+    return (f"Nessa 🤖: Terima kasih! Laporan diterima. Anda mendapatkan {pts} poin. Total poin sekarang: {total}. "
+            "Ketik 'nomor <telepon>' agar poin tersimpan permanen.")
+
+# nomor <telepon>: send a verification code; verifikasi <kode>: link the chat
+# to that customer so points go to the ledger
+@router.intent("link_phone", exact=("nomor",), prefix=("nomor",))
+def reply_link_phone(msg, low, session_obj):
+    phone = points.normalize_phone(_rest(msg))
+    if not phone:
+        return "Nessa 🤖: Nomor tidak valid. Contoh: 'nomor 081234567890'."
+    status = points.request_otp(phone)
+    if status == "unavailable":
+        return "Nessa 🤖: Maaf, verifikasi nomor sedang tidak tersedia. Coba lagi nanti."
+    session_obj["points_pending"] = phone
+    if status == "wait":
+        return "Nessa 🤖: Kode verifikasi baru saja dikirim. Tunggu sebentar sebelum meminta kode baru."
+    return f"Nessa 🤖: Kode verifikasi 6 digit telah dikirim ke {phone}. Ketik 'verifikasi <kode>'."
+
+@router.intent("verify_phone", exact=("verifikasi",), prefix=("verifikasi",))
+def reply_verify_phone(msg, low, session_obj):
+    phone = session_obj.get("points_pending")
+    if not phone:
+        return "Nessa 🤖: Ketik 'nomor <telepon>' dulu untuk meminta kode verifikasi."
+    if not points.verify_otp(phone, _rest(msg)):
+        return "Nessa 🤖: Kode salah atau kedaluwarsa. Ketik 'nomor <telepon>' untuk meminta kode baru."
+    moved = points.link_session(session_obj, phone)
+    extra = f" {moved} poin dari sesi ini dipindahkan." if moved else ""
+    return f"Nessa 🤖: Nomor {phone} terverifikasi.{extra} Total poin: {points.balance(phone)}."
+
+# greet variations
+@router.intent("greet", keywords=("halo", "hai", "hi", "selamat"), cacheable=True)
+def reply_greet(msg, low, session_obj):
+    return ("Nessa 🤖: Halo! Aku Nessa — asisten virtual Nestlé. "
+            "Ketik 'bantuan' untuk melihat perintah yang tersedia.")
+
+# help
+@router.intent("help", keywords=("bantuan", "help", "perintah"), cacheable=True)
+def reply_help(msg, low, session_obj):
+    help_text = (
+        "Nessa 🤖 — Perintah yang tersedia:\n"
+        "- menu / produk : lihat katalog singkat\n"
+        "- menu <kategori> : produk per kategori, termurah dulu\n"
+        "- produk <nama> : info produk (contoh: 'produk milo')\n"
+        "- resep <produk> : ide resep sederhana (contoh: 'resep milo')\n"
+        "- rekomendasi gizi usia <usia> <tujuan> : contoh 'rekomendasi gizi usia 30 weight_loss'\n"
+        "- pesan <produk> <qty> : tambah ke keranjang (contoh: 'pesan milo 2')\n"
+        "- keranjang : lihat isi keranjang\n"
+        "- checkout : selesaikan pembelian (akan meminta nama/telepon)\n"
+        "- lapor daur ulang <jumlah> <produk> : dapatkan eco-poin\n"
+        "- nomor <telepon> lalu verifikasi <kode> : simpan poin ke nomor Anda\n"
+        "- poin saya : lihat poin daur ulang\n"
+        "- tukar poin [ongkir|diskon] : lihat atau tukar reward\n"
+    )
+    return Markup(help_text)
+
+# specific short product keywords (Nescafe etc)
+@router.intent("blurb_nescafe", keywords=("nescafe",), cacheable=True)
+def reply_nescafe(msg, low, session_obj):
+    return Markup(
+        "Nessa 🤖: ☕ *Nescafé* — kopi instan dari biji pilihan.\n"
+        "- *Classic*: rasa kuat & pekat.\n"
+        "- *Gold*: aroma halus, cita rasa premium.\n"
+        "- *Latte*: creamy, nikmat dengan susu.\n"
+        "Ketik 'produk Nescafé' atau 'pesan Nescafé 1' untuk menambahkan ke keranjang."
+    )
+
+@router.intent("blurb_milo", keywords=("milo",), cacheable=True)
+def reply_milo(msg, low, session_obj):
+    return ("Nessa 🤖: Milo Active-Go cocok untuk aktivitas dan pertumbuhan anak; "
+            "mengandung karbohidrat & protein untuk energi.")
+
+@router.intent("blurb_dancow", keywords=("dancow",), cacheable=True)
+def reply_dancow(msg, low, session_obj):
+    return ("Nessa 🤖: Dancow Fortigro diformulasikan untuk membantu tumbuh kembang anak "
+            "dengan vitamin & mineral esensial.")
+
+@router.intent("blurb_cerelac", keywords=("cerelac",), cacheable=True)
+def reply_cerelac(msg, low, session_obj):
+    return ("Nessa 🤖: Cerelac membantu pemberian MPASI dengan kandungan zat besi & vitamin.")
+
+@router.intent("blurb_bearbrand", keywords=("bear brand", "bearbrand"), cacheable=True)
+def reply_bearbrand(msg, low, session_obj):
+    return ("Nessa 🤖: Bear Brand susu steril yang membantu menjaga daya tahan tubuh.")
+
+# cart viewing
+@router.intent("cart", keywords=("keranjang", "cart"), stream=True)
+def reply_cart(msg, low, session_obj):
+    cart = session_obj.get("cart", {})
+    if not cart:
+        yield "Nessa 🤖: Keranjang Anda kosong 🛒"
+        return
+    yield "Nessa 🤖: Isi keranjang:"
+    subtotal, details = compute_subtotal_from_cart(cart)
+    for d in details:
+        yield f"- {d['product'].name} x{d['qty']} = Rp{d['line']:,}"
+    yield f"Total: Rp{subtotal:,}"
+
+def _balance(session_obj):
+    phone = points.session_phone(session_obj)
+    return points.balance(phone) if phone else session_obj.get("eco_points", 0)
+
+@router.intent("points", exact=("poin",), keywords=("poin saya",))
+def reply_points(msg, low, session_obj):
+    return f"Nessa 🤖: Poin daur ulang Anda: {_balance(session_obj)}."
+
+# tukar poin [ongkir|diskon]
+@router.intent("redeem", keywords=("tukar poin",))
+def reply_redeem(msg, low, session_obj):
+    pts = _balance(session_obj)
+    phone = points.session_phone(session_obj)
+    choice = next((k for k in points.REWARDS if k in low.split()), None)
+    if choice is None:
+        rewards = [f"{r.label} ({r.cost} poin, ketik 'tukar poin {key}')"
+                   for key, r in sorted(points.REWARDS.items(), key=lambda kv: -kv[1].cost) if pts >= r.cost]
+        lines = [f"- {r}" for r in rewards]
+        if phone:
+            lines += [f"- Voucher aktif: {code} ({points.REWARDS[key].label})" for code, key in points.open_vouchers(phone)]
+        if not lines:
             return f"Nessa 🤖: Anda punya {pts} poin. Kumpulkan lebih banyak untuk menukar reward (200, 500 poin)."
-        return Markup("Nessa 🤖: Reward yang bisa ditukar:<br/>" + "<br/>".join(f"- {r}" for r in rewards))
+        return Markup("Nessa 🤖: Reward yang bisa ditukar:<br/>" + "<br/>".join(lines))
+    if not phone:
+        return "Nessa 🤖: Untuk menukar poin, verifikasi nomor telepon dulu: ketik 'nomor 08xxxxxxxxxx'."
+    reward = points.REWARDS[choice]
+    code = points.redeem(phone, choice)
+    if code is None:
+        return f"Nessa 🤖: Poin belum cukup untuk {reward.label} ({reward.cost} poin). Poin Anda: {points.balance(phone)}."
+    return (f"Nessa 🤖: Berhasil! {reward.label} ditukar dengan {reward.cost} poin. Kode voucher: {code} "
+            f"(sekali pakai, masukkan sebagai kode promo saat checkout dengan nomor {phone}). "
+            f"Sisa poin: {points.balance(phone)}.")
 
-    # fallback - try product fuzzy suggestion
+# fallback - try product fuzzy suggestion
+def reply_fallback(msg, low, session_obj):
     prods = fuzzy_search_product(msg, n=3, cutoff=0.25)
     suggestions = []
     if prods:
@@ -0,0 +1,110 @@
+# nutrition.py
+from collections import namedtuple
+import numpy as np
+
+# Nutrient columns of the matrix, and the scale each one is normalized by
+# before distances are taken (roughly one "serving step" of that nutrient).
+FEATURES = ("calories", "protein", "fat", "carbs")
+SCALE = np.array([100.0, 5.0, 5.0, 15.0])
+
+# target/weights follow FEATURES. `categories` is a hard filter (None = any
+# category); `prefer` adds a score bonus for the listed categories.
+Profile = namedtuple("Profile", ["advice", "target", "weights", "categories", "prefer"])
+
+PROFILES = {
+    "infant": Profile("Untuk bayi di bawah 2 tahun, utamakan ASI dan konsultasi dokter.",
+                      (400, 10, 9, 60), (1.0, 1.0, 0.5, 0.5), ("baby",), ()),
+    "child": Profile("Anak memerlukan nutrisi seimbang: karbohidrat, protein, lemak sehat.",
+                     (250, 10, 8, 30), (1.0, 2.0, 0.5, 0.5), ("milk", "baby"), ()),
+    "weight_loss": Profile("Kurangi gula/lemak, pilih porsi kecil, tambah protein & serat.",
+                           (120, 10, 2, 12), (2.0, 1.5, 1.0, 1.0), None, ()),
+    "weight_gain": Profile("Tambah asupan kalori berkualitas & protein.",
+                           (450, 12, 10, 65), (2.0, 1.5, 0.3, 0.5), None, ()),
+    "maintenance": Profile("Seimbangkan porsi, olahraga teratur.",
+                           (250, 8, 8, 30), (1.0, 1.0, 1.0, 1.0), None, ()),
+    "lactating": Profile("Ibu menyusui butuh ekstra kalori dan cairan.",
+                         (300, 12, 8, 30), (1.0, 1.5, 0.5, 0.5), ("milk",), ()),
+    "pregnant": Profile("Ibu hamil butuh protein, zat besi & asam folat ekstra; pilih produk bergizi dan rutin periksa kehamilan.",
+                        (250, 12, 6, 25), (1.0, 2.0, 1.0, 0.5), None, ("milk",)),
+    "child_growth": Profile("Masa tumbuh kembang butuh protein, kalsium & energi cukup setiap hari.",
+                            (300, 12, 8, 40), (1.0, 2.0, 0.5, 0.5), ("milk", "baby"), ()),
+}
+GOAL_ALIASES = {"": "maintenance", "weightgain": "weight_gain"}
+GENERIC_ADVICE = "Konsultasikan kebutuhan spesifik dengan ahli gizi."
+PREFER_BONUS = 1.0
+TOP_K = 3
+
+class NutritionMatrix:
+    """Products with complete nutrition data as an (n, 4) float matrix.
+
+    Built once per catalog snapshot, so it refreshes with the catalog version.
+    Results are memoized per profile for the lifetime of the snapshot.
+    """
+
+    def __init__(self, products):
+        rows = [p for p in products if all(getattr(p, f) is not None for f in FEATURES)]
+        self.products = rows
+        self.matrix = np.array([[getattr(p, f) for f in FEATURES] for p in rows], dtype=float).reshape(-1, len(FEATURES))
+        self.normalized = self.matrix / SCALE
+        self.category_codes = {}
+        self.categories = np.array(
+            [self.category_codes.setdefault(p.category, len(self.category_codes)) for p in rows], dtype=np.int32)
+        self._subsets = {}
+        self._memo = {}
+
+    def __len__(self):
+        return len(self.products)
+
+    def _subset(self, categories):
+        """Row indices whose category is in `categories` (cached)."""
+        idx = self._subsets.get(categories)
+        if idx is None:
+            codes = [self.category_codes[c] for c in categories if c in self.category_codes]
+            idx = self._subsets[categories] = np.flatnonzero(np.isin(self.categories, codes))
+        return idx
+
+    def top_k(self, profile, k=TOP_K):
+        """Best k products for a profile: one vectorized score pass, then argpartition."""
+        key = (profile, k)
+        hit = self._memo.get(key)
+        if hit is not None:
+            return hit
+        if profile.categories is not None:
+            rows = self._subset(profile.categories)
+            data = self.normalized[rows]
+        else:
+            rows = None
+            data = self.normalized
+        result = []
+        if len(data):
+            diff = data - np.asarray(profile.target, dtype=float) / SCALE
+            score = -(diff * diff) @ np.asarray(profile.weights, dtype=float)
+            if profile.prefer:
+                score = score + PREFER_BONUS * np.isin(
+                    self.categories if rows is None else self.categories[rows],
+                    [self.category_codes[c] for c in profile.prefer if c in self.category_codes])
+            k = min(k, len(score))
+            idx = np.argpartition(-score, k - 1)[:k]
+            idx = idx[np.argsort(-score[idx], kind="stable")]
+            if rows is not None:
+                idx = rows[idx]
+            result = [self.products[i] for i in idx]
+        self._memo[key] = result
+        return result
+
+def profile_for(age=None, goal=None):
+    """Profile key for an age/goal pair, or None for goals we have no profile for."""
+    if age is not None and age < 2:
+        return "infant"
+    g = GOAL_ALIASES.get(goal, goal)
+    if age is not None and age < 12 and g != "child_growth":
+        return "child"
+    return g if g in PROFILES else None
+
+def recommend(matrix, age=None, goal=None, k=TOP_K):
+    """(advice text, recommended products) for an age/goal pair."""
+    key = profile_for(age, goal)
+    if key is None:
+        return GENERIC_ADVICE, []
+    profile = PROFILES[key]
+    return profile.advice, matrix.top_k(profile, k)
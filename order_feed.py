@@ -0,0 +1,113 @@
+# order_feed.py
+import time
+from datetime import datetime
+from sqlalchemy import event, select, update, insert, and_, or_
+from sqlalchemy.orm import Session
+from models import db, Order, OrderSequence
+
+ORDER_SEQUENCE_ID = 1
+
+FEED_DEFAULTS = {
+    "ORDER_FEED_PAGE_SIZE": 200,
+    # Long-polling holds a worker for up to MAX_WAIT seconds per open admin tab.
+    # Only enable it with a threaded/async worker class (gthread, gevent);
+    # with sync workers the dashboard short-polls every REFRESH_SECONDS.
+    "ORDER_FEED_LONG_POLL": False,
+    "ORDER_FEED_MAX_WAIT": 25,         # seconds a long-poll may hold a worker
+    "ORDER_FEED_REFRESH_SECONDS": 15,  # dashboard short-poll interval
+    "ORDER_FEED_POLL_INTERVAL": 0.5,   # seconds between head checks while waiting
+    "ORDER_BULK_MAX": 1000,            # ids per bulk status update
+}
+
+def next_change_seq(session=None):
+    """Reserve the next change sequence value inside the caller's transaction."""
+    session = session or db.session
+    conn = session.connection()
+    table = OrderSequence.__table__
+    res = conn.execute(
+        update(table).where(table.c.id == ORDER_SEQUENCE_ID).values(value=table.c.value + 1)
+    )
+    if res.rowcount == 0:
+        conn.execute(insert(table).values(id=ORDER_SEQUENCE_ID, value=1))
+        return 1
+    return conn.execute(select(table.c.value).where(table.c.id == ORDER_SEQUENCE_ID)).scalar()
+
+def head_seq(session=None):
+    """Latest committed change sequence value (0 for an empty feed)."""
+    session = session or db.session
+    v = session.execute(
+        select(OrderSequence.value).where(OrderSequence.id == ORDER_SEQUENCE_ID)
+    ).scalar()
+    return v or 0
+
+# Every ORM insert/update of an Order gets a fresh change_seq, once per flush,
+# so checkout and admin edits feed the change log without extra bookkeeping.
+# Core bulk updates (bulk_set_status) take their own value.
+@event.listens_for(Session, "before_flush")
+def _stamp_order_changes(session, flush_context, instances):
+    changed = [o for o in session.new if isinstance(o, Order)]
+    changed += [o for o in session.dirty if isinstance(o, Order) and session.is_modified(o)]
+    if not changed:
+        return
+    seq = next_change_seq(session)
+    now = datetime.utcnow()
+    for o in changed:
+        o.change_seq = seq
+        o.updated_at = now
+
+def encode_cursor(seq, oid=None):
+    return f"{seq}-{oid}" if oid is not None else str(seq)
+
+def decode_cursor(cursor):
+    """(seq, id or None) from 'seq' or 'seq-id'; None if malformed."""
+    try:
+        seq, _, oid = cursor.partition("-")
+        return int(seq), (int(oid) if oid else None)
+    except (AttributeError, ValueError):
+        return None
+
+def _after(seq, oid):
+    if oid is None:
+        return Order.change_seq > seq
+    return or_(Order.change_seq > seq, and_(Order.change_seq == seq, Order.id > oid))
+
+def changes_since(seq, oid=None, limit=200):
+    """(orders changed after the cursor in feed order, next cursor, more?)."""
+    rows = (db.session.execute(
+        select(Order).where(_after(seq, oid)).order_by(Order.change_seq, Order.id).limit(limit + 1)
+    ).scalars().all())
+    more = len(rows) > limit
+    rows = rows[:limit]
+    cursor = encode_cursor(rows[-1].change_seq, rows[-1].id) if rows else encode_cursor(seq, oid)
+    return rows, cursor, more
+
+def wait_for_changes(seq, timeout, interval):
+    """Block until the feed head moves past `seq` or `timeout` seconds pass.
+
+    Only the one-row order_sequence is read while waiting, and each check runs
+    in a fresh read transaction so SQLite's WAL snapshot sees new commits.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        db.session.rollback()
+        if head_seq() > seq:
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(interval, remaining))
+
+def bulk_set_status(ids, status):
+    """Set `status` on every listed order in one UPDATE; returns (rows changed, seq).
+
+    Orders already in that status are left alone so they do not reappear in
+    the feed. The caller commits.
+    """
+    seq = next_change_seq()
+    res = db.session.execute(
+        update(Order)
+        .where(Order.id.in_(ids), Order.status != status)
+        .values(status=status, change_seq=seq, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return res.rowcount, seq
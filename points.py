@@ -0,0 +1,323 @@
+# points.py
+import atexit
+import hashlib
+import hmac
+import os
+import re
+import secrets
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from flask import current_app
+from werkzeug.utils import import_string
+from sqlalchemy import select, update, insert, func
+from sqlalchemy.dialects import sqlite, postgresql
+from models import db, PointsLedger, PointsBalance, PointsOtp, PointsVoucher
+from promotions import PromoRule
+from applog import log
+
+POINTS_DEFAULTS = {
+    "POINTS_BATCH_SIZE": 100,       # earn entries per ledger write; 1 writes every entry at once
+    "POINTS_FLUSH_SECONDS": 1.0,    # longest an earn entry waits in memory before it is written
+    # phone verification: a session only gets a ledger after proving it owns the number
+    "POINTS_OTP_SENDER": None,      # callable(phone, code) or "module:function" (SMS/WhatsApp gateway)
+    "POINTS_OTP_TTL_SECONDS": 300,
+    "POINTS_OTP_RESEND_SECONDS": 60,
+    "POINTS_OTP_MAX_TRIES": 5,
+}
+
+# A reward is redeemed for a single-use voucher code that checkout applies
+# like a promotion (see voucher_promotion / use_voucher).
+Reward = namedtuple("Reward", ["cost", "label", "discount_percent", "free_shipping"])
+REWARDS = {
+    "ongkir": Reward(200, "Voucher gratis ongkir", 0.0, True),
+    "diskon": Reward(500, "Voucher diskon 20%", 20.0, False),
+}
+VOUCHER_PREFIX = "ECO"
+
+def normalize_phone(raw):
+    """Digits-only phone with a leading 0 (+62/62 prefixes folded), or None if implausible."""
+    digits = re.sub(r"\D", "", raw or "")
+    if digits.startswith("62"):
+        digits = "0" + digits[2:]
+    return digits if 8 <= len(digits) <= 15 and digits.startswith("0") else None
+
+def _upsert_balances(conn, deltas, now):
+    table = PointsBalance.__table__
+    ins = (postgresql if conn.dialect.name == "postgresql" else sqlite).insert(table)
+    stmt = ins.on_conflict_do_update(
+        index_elements=[table.c.phone],
+        set_={"balance": table.c.balance + ins.excluded.balance, "updated_at": ins.excluded.updated_at},
+    )
+    conn.execute(stmt, [{"phone": p, "balance": d, "updated_at": now} for p, d in deltas.items()])
+
+class LedgerWriter:
+    """Buffers point credits in memory and writes them to the ledger in batches.
+
+    Each batch is one multi-row ledger insert plus one balance upsert per
+    customer, in a single transaction, from a background thread (or inline
+    once POINTS_BATCH_SIZE entries are waiting). balance() adds this worker's
+    unwritten credits, so a customer sees their points straight away.
+    Credits still in memory when a worker is killed are lost; set
+    POINTS_BATCH_SIZE to 1 to write every credit synchronously.
+    """
+
+    def __init__(self, app, batch_size, interval):
+        self.app = app
+        self.batch_size = batch_size
+        self.interval = interval
+        self._lock = threading.Lock()        # guards _pending / _unwritten
+        self._write_lock = threading.Lock()  # one flush at a time; balance reads see commit + bookkeeping together
+        self._pending = []
+        self._unwritten = {}  # phone -> credits queued or being written by this worker
+        self._pid = None
+
+    def _ensure_thread(self):
+        # forked workers inherit neither the thread nor a buffer they should write
+        if self._pid == os.getpid():
+            return
+        self._pending, self._unwritten, self._pid = [], {}, os.getpid()
+        threading.Thread(target=self._run, name="points-writer", daemon=True).start()
+
+    def add(self, phone, delta, reason, ref=None):
+        with self._lock:
+            self._ensure_thread()
+            self._pending.append({"phone": phone, "delta": delta, "reason": reason, "ref": ref,
+                                  "created_at": datetime.utcnow()})
+            self._unwritten[phone] = self._unwritten.get(phone, 0) + delta
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def unwritten(self, phone):
+        with self._lock:
+            return self._unwritten.get(phone, 0)
+
+    def flush(self):
+        """Write everything buffered so far; safe to call from any thread."""
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            deltas = {}
+            for row in batch:
+                deltas[row["phone"]] = deltas.get(row["phone"], 0) + row["delta"]
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as conn:
+                        conn.execute(insert(PointsLedger.__table__), batch)
+                        _upsert_balances(conn, deltas, datetime.utcnow())
+            except Exception as e:
+                with self._lock:
+                    self._pending[:0] = batch  # keep them for the next attempt
+                log(f"points flush failed, {len(batch)} entries kept: {e}", level="error")
+                return
+            with self._lock:
+                for phone, d in deltas.items():
+                    left = self._unwritten.get(phone, 0) - d
+                    if left:
+                        self._unwritten[phone] = left
+                    else:
+                        self._unwritten.pop(phone, None)
+
+    def balance(self, phone):
+        with self._write_lock:
+            with self.app.app_context(), db.engine.connect() as conn:
+                stored = conn.execute(
+                    select(PointsBalance.balance).where(PointsBalance.phone == phone)).scalar() or 0
+            return stored + self.unwritten(phone)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+_writers = []
+
+def init_points(app):
+    for key, value in POINTS_DEFAULTS.items():
+        app.config.setdefault(key, value)
+    writer = LedgerWriter(app, max(int(app.config["POINTS_BATCH_SIZE"]), 1),
+                          float(app.config["POINTS_FLUSH_SECONDS"]))
+    app.extensions["nsb_points"] = writer
+    _writers.append(writer)
+    return writer
+
+def _writer():
+    return current_app.extensions["nsb_points"]
+
+def earn(phone, points, reason, ref=None):
+    """Credit points to a customer (batched, see LedgerWriter)."""
+    _writer().add(phone, points, reason, ref)
+
+def balance(phone):
+    """Current balance: one primary-key read plus this worker's unwritten credits."""
+    return _writer().balance(phone)
+
+def redeem(phone, reward_key):
+    """Spend points on REWARDS[reward_key]; returns the new voucher code, or None if the balance is short.
+
+    A single conditional UPDATE on the balance row decides, so two concurrent
+    redemptions can never both spend the same points. The debit, its ledger
+    entry and the voucher commit together.
+    """
+    reward = REWARDS[reward_key]
+    writer = _writer()
+    writer.flush()  # credits buffered in this worker count towards the balance
+    table = PointsBalance.__table__
+    code = VOUCHER_PREFIX + secrets.token_hex(5).upper()
+    now = datetime.utcnow()
+    try:
+        res = db.session.execute(
+            update(table).where(table.c.phone == phone, table.c.balance >= reward.cost)
+            .values(balance=table.c.balance - reward.cost, updated_at=now)
+        )
+        if res.rowcount != 1:
+            db.session.rollback()
+            return None
+        entry_id = db.session.execute(
+            insert(PointsLedger.__table__).values(phone=phone, delta=-reward.cost, reason=f"redeem:{reward_key}",
+                                                  ref=code, created_at=now)
+        ).inserted_primary_key[0]
+        db.session.execute(insert(PointsVoucher.__table__).values(
+            code=code, phone=phone, reward=reward_key, ledger_id=entry_id, created_at=now))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return code
+
+def open_vouchers(phone):
+    """Unused voucher codes of a customer, newest first: [(code, reward key)]."""
+    return db.session.execute(
+        select(PointsVoucher.code, PointsVoucher.reward)
+        .where(PointsVoucher.phone == phone, PointsVoucher.used_at.is_(None))
+        .order_by(PointsVoucher.created_at.desc())
+    ).all()
+
+def voucher_promotion(code, phone):
+    """PromoRule for an unused voucher owned by `phone`, or None (not a voucher, used, or someone else's)."""
+    code = (code or "").strip().upper()
+    if not code.startswith(VOUCHER_PREFIX):
+        return None
+    v = db.session.execute(
+        select(PointsVoucher.reward, PointsVoucher.phone)
+        .where(PointsVoucher.code == code, PointsVoucher.used_at.is_(None))
+    ).first()
+    if v is None or v.phone != normalize_phone(phone):
+        return None
+    r = REWARDS[v.reward]
+    return PromoRule(code, r.label, r.discount_percent, 0, False, None, r.free_shipping)
+
+def use_voucher(code, order_id):
+    """Mark a voucher used by `order_id` in the caller's transaction; False if it was already used."""
+    t = PointsVoucher.__table__
+    res = db.session.execute(
+        update(t).where(t.c.code == code.strip().upper(), t.c.used_at.is_(None))
+        .values(used_at=datetime.utcnow(), order_id=order_id)
+    )
+    return res.rowcount == 1
+
+def session_phone(session_obj):
+    """The verified phone linked to this chat session, or None."""
+    return session_obj.get("points_phone")
+
+def _otp_hash(phone, code):
+    return hashlib.sha256(f"{phone}:{code}".encode()).hexdigest()
+
+def _dev_sender(phone, code):
+    log(f"points OTP for {phone}: {code} (no POINTS_OTP_SENDER configured)", level="warning")
+
+def _otp_sender():
+    sender = current_app.config["POINTS_OTP_SENDER"]
+    if isinstance(sender, str):
+        return import_string(sender)
+    if sender is None and (current_app.debug or current_app.testing):
+        return _dev_sender  # codes only ever go to the log outside production
+    return sender
+
+def request_otp(phone):
+    """Send a verification code to `phone`; returns "sent", "wait" or "unavailable"."""
+    sender = _otp_sender()
+    if sender is None:
+        return "unavailable"
+    cfg = current_app.config
+    now = datetime.utcnow()
+    row = db.session.get(PointsOtp, phone)
+    if row is not None and row.sent_at > now - timedelta(seconds=cfg["POINTS_OTP_RESEND_SECONDS"]):
+        return "wait"
+    code = f"{secrets.randbelow(10 ** 6):06d}"
+    if row is None:
+        row = PointsOtp(phone=phone)
+        db.session.add(row)
+    row.code_hash = _otp_hash(phone, code)
+    row.expires_at = now + timedelta(seconds=cfg["POINTS_OTP_TTL_SECONDS"])
+    row.sent_at = now
+    row.tries = 0
+    db.session.commit()
+    sender(phone, code)
+    return "sent"
+
+def verify_otp(phone, code):
+    """True if `code` is the live code for `phone`; each miss uses up one of the allowed tries."""
+    row = db.session.get(PointsOtp, phone)
+    if row is None or row.expires_at < datetime.utcnow() or row.tries >= current_app.config["POINTS_OTP_MAX_TRIES"]:
+        return False
+    if not hmac.compare_digest(row.code_hash, _otp_hash(phone, (code or "").strip())):
+        row.tries += 1
+        db.session.commit()
+        return False
+    db.session.delete(row)
+    db.session.commit()
+    return True
+
+def link_session(session_obj, phone):
+    """Attach a verified phone to the chat session and move guest points to its ledger.
+
+    Only call after verify_otp(): the link gives the session the customer's
+    balance and lets it redeem.
+    """
+    session_obj["points_phone"] = phone
+    session_obj.pop("points_pending", None)
+    guest = session_obj.pop("eco_points", 0)
+    if guest:
+        earn(phone, guest, "session_merge")
+    return guest
+
+def history(phone, before_id=None, limit=50):
+    """Ledger entries for a customer, newest first (keyset on id)."""
+    q = select(PointsLedger).where(PointsLedger.phone == phone)
+    if before_id:
+        q = q.where(PointsLedger.id < before_id)
+    return db.session.execute(q.order_by(PointsLedger.id.desc()).limit(limit)).scalars().all()
+
+def reconcile(fix=False):
+    """Compare every stored balance with SUM(delta) over the ledger; optionally repair.
+
+    Returns [(phone, stored, ledger_sum)] for the customers that disagree.
+    """
+    for w in _writers:
+        w.flush()
+    sums = select(PointsLedger.phone, func.sum(PointsLedger.delta).label("total")).group_by(PointsLedger.phone).subquery()
+    rows = db.session.execute(
+        select(sums.c.phone, func.coalesce(PointsBalance.balance, 0), sums.c.total)
+        .outerjoin(PointsBalance, PointsBalance.phone == sums.c.phone)
+        .where(func.coalesce(PointsBalance.balance, 0) != sums.c.total)
+    ).all()
+    if fix and rows:
+        now = datetime.utcnow()
+        conn = db.session.connection()
+        _upsert_balances(conn, {phone: total - stored for phone, stored, total in rows}, now)
+        db.session.commit()
+    return [tuple(r) for r in rows]
+
+def _flush_all():
+    for w in _writers:
+        try:
+            w.flush()
+        except Exception:
+            pass
+
+atexit.register(_flush_all)
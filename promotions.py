@@ -0,0 +1,46 @@
+# promotions.py
+from collections import namedtuple
+
+# Immutable promotion rule built from an active Promotion row.
+PromoRule = namedtuple("PromoRule", [
+    "code", "description", "discount_percent", "min_subtotal",
+    "catering_only", "min_pax", "free_shipping",
+])
+
+# Outcome of applying one rule to a cart: `savings` is discount plus any
+# waived delivery fee and is what best() maximizes.
+PromoResult = namedtuple("PromoResult", ["rule", "discount", "free_shipping", "savings"])
+
+class PromotionTable:
+    """In-memory rule table for the active promotions of one catalog version."""
+
+    def __init__(self, rules=()):
+        self.rules = tuple(rules)
+        self.by_code = {r.code: r for r in self.rules}
+
+    def _apply(self, rule, subtotal, is_catering, pax, delivery_fee):
+        if subtotal < (rule.min_subtotal or 0):
+            return None
+        if rule.catering_only and not is_catering:
+            return None
+        if rule.min_pax and (pax or 0) < rule.min_pax:
+            return None
+        discount = int(subtotal * ((rule.discount_percent or 0) / 100.0))
+        waived = delivery_fee if rule.free_shipping else 0
+        return PromoResult(rule, discount, bool(rule.free_shipping), discount + waived)
+
+    def evaluate(self, code, subtotal, is_catering=False, pax=0, delivery_fee=0):
+        """PromoResult for `code` if it is active and applies to this cart, else None."""
+        rule = self.by_code.get((code or "").strip().upper())
+        if rule is None:
+            return None
+        return self._apply(rule, subtotal, is_catering, pax, delivery_fee)
+
+    def best(self, subtotal, is_catering=False, pax=0, delivery_fee=0):
+        """Applicable PromoResult with the largest savings, or None."""
+        best = None
+        for rule in self.rules:
+            res = self._apply(rule, subtotal, is_catering, pax, delivery_fee)
+            if res is not None and res.savings > 0 and (best is None or res.savings > best.savings):
+                best = res
+        return best
@@ -0,0 +1,117 @@
+# query_audit.py
+"""EXPLAIN QUERY PLAN audit of the app's hot queries on a large seeded dataset.
+
+Seeds a throwaway SQLite database, drives the hot routes of app.py (which
+call into utils.py and sales_stats.py) through the Flask test client plus a
+sales stats rebuild, captures every statement they issue and runs EXPLAIN
+QUERY PLAN on each, including the INSERT .. SELECT .. ON CONFLICT upserts of
+sales_stats. Exits with status 1 if a filtered query (one with a WHERE
+clause) plans a full table scan.
+
+    python query_audit.py --products 5000 --orders 50000
+    python query_audit.py --drop-index ix_order_item_order_id_fk   # must fail
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+def exercise(app):
+    """Hit every hot route once; returns nothing, statements are captured by the caller."""
+    import sales_stats
+    from models import db
+    c = app.test_client()
+    c.post("/api/search", json={"q": "milo"})
+    for msg in ["menu", "produk dancow", "rekomendasi gizi usia 30 weight_loss", "pesan milo 2", "keranjang"]:
+        c.post("/api/chat", json={"message": msg})
+    c.post("/api/cart/add", json={"product_id": 1, "qty": 2})
+    c.get("/api/cart/view")
+    c.post("/api/checkout", json={"name": "audit", "phone": "0800", "promo": "WELCOME10"})
+    c.post("/api/checkout", json={"name": "audit", "phone": "0800", "is_catering": True, "pax": 60, "promo": "CATER5"})
+
+    c.post("/admin/login", data={"password": app.config.get("ADMIN_PASSWORD", "admin123")})
+    day = (datetime.utcnow() - timedelta(days=30)).strftime("%Y-%m-%d")
+    for qs in ["", "?status=pending", f"?from={day}&to={day}", "?status=delivered&from=" + day]:
+        r = c.get("/admin/orders" + qs)
+        page = r.get_data(as_text=True)
+        marker = "cursor="
+        if marker in page:
+            cursor = page.split(marker, 1)[1].split("&", 1)[0].split('"', 1)[0]
+            c.get(f"/admin/orders?cursor={cursor}")
+    c.get(f"/admin/export?items=1&from={day}&to={day}").get_data()
+    c.post("/admin/update/1", data={"status": "confirmed"})
+    c.post("/admin/orders/status", json={"ids": [2, 3], "status": "preparing"})
+    since = (datetime.utcnow() - timedelta(days=30)).date()
+    sales_stats.rebuild(start=since, end=since)
+    db.session.commit()
+
+# Tables read whole on purpose: the catalog snapshot loads every active
+# promotion, and there are only ever a handful of them.
+SMALL_TABLES = {"promotion"}
+
+def audit(db, statements):
+    failures = []
+    with db.engine.connect() as conn:
+        for sql, params in statements:
+            plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params).all()
+            details = [row[-1] for row in plan]
+            # compiled SQL puts WHERE at the start of a line, so match the word
+            filtered = re.search(r"\bWHERE\b", sql, re.I) is not None
+            scans = [d for d in details if d.startswith("SCAN ") and " USING " not in d
+                     and d.split()[1] not in SMALL_TABLES]
+            status = "ok"
+            if scans and filtered:
+                status = "FULL SCAN"
+                failures.append(sql)
+            elif scans or any(d.startswith("SCAN ") for d in details):
+                status = "bulk read"
+            print(f"[{status}] {' '.join(sql.split())[:140]}")
+            for d in details:
+                print(f"      {d}")
+    return failures
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--products", type=int, default=5000)
+    ap.add_argument("--orders", type=int, default=50000)
+    ap.add_argument("--drop-index", action="append", default=[], metavar="NAME",
+                    help="drop this index after seeding, to check the audit catches it")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="nsb-audit-")
+    os.environ["NESTLE_SMARTBOT_SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tmp, 'audit.db')}"
+    os.environ["NESTLE_SMARTBOT_LOG"] = os.path.join(tmp, "audit.log")
+    os.environ["NESTLE_SMARTBOT_SESSION_SQLITE_PATH"] = os.path.join(tmp, "sessions.db")
+    from sqlalchemy import event, text
+    from app import app
+    from models import db
+    from benchmarks.synthetic import seed_large
+
+    with app.app_context():
+        seed_large(db, args.products, args.orders)
+        for name in args.drop_index:
+            db.session.execute(text(f'DROP INDEX "{name}"'))
+        db.session.commit()
+        captured = {}
+
+        @event.listens_for(db.engine, "before_cursor_execute")
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            verb = statement.lstrip().split(None, 1)[0].upper()
+            if executemany:
+                return
+            # INSERT .. VALUES has no plan worth reading; INSERT .. SELECT
+            # (the sales_stats upserts) is planned like its SELECT
+            if verb in ("SELECT", "UPDATE", "DELETE") or (verb == "INSERT" and " SELECT " in statement.upper()):
+                captured.setdefault(statement, parameters)
+
+        exercise(app)
+        event.remove(db.engine, "before_cursor_execute", capture)
+        failures = audit(db, list(captured.items()))
+
+    print(f"\n{len(captured)} statements audited, {len(failures)} full scans")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# sales_stats.py
+from datetime import timedelta
+from sqlalchemy import select, delete, func, literal, case, and_
+from sqlalchemy.dialects import sqlite, postgresql
+from models import db, Order, OrderItem, SalesDaily, ProductSalesDaily
+
+BACKFILL_CHUNK_SIZE = 20000
+EXCLUDED_STATUSES = ("cancelled",)  # left out of report totals unless asked for
+
+# Aggregates are keyed by (day, status) so a status change is a move between
+# rows: subtract the order from its old status, add it under the new one.
+# Every update is an INSERT .. SELECT .. ON CONFLICT DO UPDATE that derives
+# the delta from the order rows themselves, so it reads the order's current
+# state inside the same write transaction as the change.
+
+def _insert(conn, table):
+    return (postgresql if conn.dialect.name == "postgresql" else sqlite).insert(table)
+
+def _day(conn, col):
+    if conn.dialect.name == "sqlite":
+        return func.date(col)
+    return func.to_char(col, "YYYY-MM-DD")
+
+def _add_to(ins, table, keys):
+    return ins.on_conflict_do_update(
+        index_elements=keys,
+        set_={c.name: table.c[c.name] + ins.excluded[c.name] for c in table.c if c.name not in keys},
+    )
+
+def _apply(conn, where, sign=1, status=None):
+    """Add (sign=1) or subtract (sign=-1) the orders matching `where`.
+
+    `status` files them under that status instead of their current one.
+    """
+    day = _day(conn, Order.created_at).label("day")
+    st = (literal(status) if status is not None else Order.status).label("status")
+    catering = case((Order.is_catering == True, 1), else_=0)
+    orders_q = (
+        select(day, st, sign * func.count(), sign * func.sum(Order.subtotal), sign * func.sum(Order.discount),
+               sign * func.sum(Order.tax), sign * func.sum(Order.delivery_fee), sign * func.sum(Order.total),
+               sign * func.sum(catering), sign * func.sum(catering * func.coalesce(Order.pax, 0)))
+        .where(where).group_by(day, st)
+    )
+    t = SalesDaily.__table__
+    ins = _insert(conn, t).from_select(
+        ["day", "status", "orders", "subtotal", "discount", "tax", "delivery_fee", "revenue",
+         "catering_orders", "catering_pax"], orders_q)
+    conn.execute(_add_to(ins, t, ["day", "status"]))
+
+    items_q = (
+        select(day, OrderItem.product_id, st, sign * func.sum(OrderItem.quantity),
+               sign * func.sum(OrderItem.quantity * OrderItem.unit_price))
+        .join(Order, Order.id == OrderItem.order_id_fk)
+        .where(where).group_by(day, OrderItem.product_id, st)
+    )
+    t = ProductSalesDaily.__table__
+    ins = _insert(conn, t).from_select(["day", "product_id", "status", "units", "revenue"], items_q)
+    conn.execute(_add_to(ins, t, ["day", "product_id", "status"]))
+
+def record_orders(order_ids, conn=None):
+    """Count newly created orders (and their items) into the aggregates."""
+    conn = conn or db.session.connection()
+    _apply(conn, Order.id.in_(order_ids))
+
+def move_status(order_ids, new_status, conn=None):
+    """Re-file orders under `new_status`; call before the status UPDATE, same transaction.
+
+    Orders already in `new_status` are skipped, matching bulk_set_status().
+    """
+    conn = conn or db.session.connection()
+    where = and_(Order.id.in_(order_ids), Order.status != new_status)
+    _apply(conn, where, sign=-1)
+    _apply(conn, where, status=new_status)
+
+def rebuild(conn=None, start=None, end=None, chunk_size=BACKFILL_CHUNK_SIZE):
+    """Recompute the aggregates from Order/OrderItem, optionally for [start, end] days only.
+
+    Works through the orders in id ranges of `chunk_size`, one set-based
+    statement pair per chunk, inside the caller's transaction: live checkouts
+    wait for it instead of being counted twice. Returns the number of chunks.
+    """
+    conn = conn or db.session.connection()
+    day_cond = []
+    if start:
+        day_cond.append(Order.created_at >= start)
+    if end:
+        day_cond.append(Order.created_at < end + timedelta(days=1))
+    for table in (SalesDaily.__table__, ProductSalesDaily.__table__):
+        stmt = delete(table)
+        if start:
+            stmt = stmt.where(table.c.day >= start.strftime("%Y-%m-%d"))
+        if end:
+            stmt = stmt.where(table.c.day <= end.strftime("%Y-%m-%d"))
+        conn.execute(stmt)
+    lo, hi = conn.execute(select(func.min(Order.id), func.max(Order.id)).where(*day_cond)).one()
+    chunks = 0
+    if lo is None:
+        return chunks
+    for first in range(lo, hi + 1, chunk_size):
+        _apply(conn, and_(Order.id >= first, Order.id < first + chunk_size, *day_cond))
+        chunks += 1
+    return chunks
+
+def report(start, end, statuses=None, top=10):
+    """Totals, daily series and top products for [start, end] from the aggregates only.
+
+    Cost depends on the number of days (and products sold) in the range, not
+    on the number of orders.
+    """
+    d0, d1 = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+    t = SalesDaily
+    status_cond = t.status.in_(statuses) if statuses else t.status.notin_(EXCLUDED_STATUSES)
+    cols = ("orders", "subtotal", "discount", "tax", "delivery_fee", "revenue", "catering_orders", "catering_pax")
+    rows = db.session.execute(
+        select(t.day, *[func.sum(getattr(t, c)) for c in cols])
+        .where(t.day >= d0, t.day <= d1, status_cond)
+        .group_by(t.day).order_by(t.day)
+    ).all()
+    days = [dict(day=r[0], **{c: int(v or 0) for c, v in zip(cols, r[1:])}) for r in rows]
+    totals = {c: sum(d[c] for d in days) for c in cols}
+
+    p = ProductSalesDaily
+    p_status = p.status.in_(statuses) if statuses else p.status.notin_(EXCLUDED_STATUSES)
+    products = db.session.execute(
+        select(p.product_id, func.sum(p.units).label("units"), func.sum(p.revenue).label("revenue"))
+        .where(p.day >= d0, p.day <= d1, p_status)
+        .group_by(p.product_id).having(func.sum(p.units) > 0)
+        .order_by(func.sum(p.revenue).desc()).limit(top)
+    ).all()
+    return {"from": d0, "to": d1, "totals": totals, "days": days,
+            "top_products": [{"product_id": pid, "units": int(u), "revenue": int(r)} for pid, u, r in products]}
@@ -0,0 +1,73 @@
+# search_index.py
+import difflib
+import heapq
+from collections import Counter, defaultdict
+
+# Number of best trigram-overlap keys scored with difflib per query. Catalogs
+# with fewer keys than this are scored exhaustively, exactly like before.
+SHORTLIST_SIZE = 200
+
+def trigrams(text, pad=True):
+    s = f"  {text} " if pad else text
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+class TrigramIndex:
+    """Character-trigram inverted index from lowercase strings to catalog items.
+
+    Fuzzy lookups shortlist the keys sharing the most trigrams with the query
+    and only run difflib scoring on those, keeping get_close_matches'
+    top-n/cutoff semantics without scanning every key.
+    """
+
+    def __init__(self, entries):
+        self.keys = []
+        self.items = []
+        self.postings = defaultdict(list)
+        key_ids = {}
+        for text, item in entries:
+            if not text:
+                continue
+            kid = key_ids.get(text)
+            if kid is None:
+                kid = key_ids[text] = len(self.keys)
+                self.keys.append(text)
+                self.items.append([])
+                for g in trigrams(text):
+                    self.postings[g].append(kid)
+            self.items[kid].append(item)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def shortlist(self, q, size=SHORTLIST_SIZE):
+        if len(self.keys) <= size:
+            return range(len(self.keys))
+        counts = Counter()
+        for g in trigrams(q):
+            counts.update(self.postings.get(g, ()))
+        return [kid for kid, _ in counts.most_common(size)]
+
+    def close_matches(self, q, n=3, cutoff=0.6):
+        """Key ids of the n best difflib matches for q, best first."""
+        s = difflib.SequenceMatcher()
+        s.set_seq2(q)
+        scored = []
+        for kid in self.shortlist(q):
+            s.set_seq1(self.keys[kid])
+            if s.real_quick_ratio() >= cutoff and s.quick_ratio() >= cutoff:
+                score = s.ratio()
+                if score >= cutoff:
+                    scored.append((score, self.keys[kid], kid))
+        return [kid for _, _, kid in heapq.nlargest(n, scored)]
+
+    def substring(self, q):
+        """Key ids containing q, in insertion order."""
+        if len(q) < 3:
+            return [kid for kid, key in enumerate(self.keys) if q in key]
+        lists = sorted((self.postings.get(g, []) for g in trigrams(q, pad=False)), key=len)
+        cand = set(lists[0])
+        for lst in lists[1:]:
+            cand.intersection_update(lst)
+            if not cand:
+                return []
+        return sorted(kid for kid in cand if q in self.keys[kid])
@@ -0,0 +1,152 @@
+# session_store.py
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from flask.sessions import SessionInterface, SessionMixin
+from flask.json.tag import TaggedJSONSerializer
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+from cache import TTLCache
+
+SESSION_DEFAULTS = {
+    "SESSION_BACKEND": "sqlite",          # "sqlite" (shared by all workers) or "memory" (single process)
+    "SESSION_SQLITE_PATH": None,          # default: <instance_path>/sessions.db
+    "SESSION_MEMORY_MAXSIZE": 10000,
+}
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session data kept server-side; only `sid` travels in the cookie."""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        CallbackDict.__init__(self, initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+class MemoryBackend:
+    """In-process LRU; sessions are not shared between workers."""
+
+    def __init__(self, maxsize, ttl):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, sid):
+        return self.cache.get(sid)
+
+    def set(self, sid, data, ttl):
+        self.cache.put(sid, data)
+
+    def delete(self, sid):
+        self.cache.pop(sid)
+
+class SQLiteBackend:
+    """Sessions in a shared SQLite file, safe for several gunicorn workers.
+
+    One connection per thread (and per process after fork); expired rows are
+    purged every `purge_every` writes.
+    """
+
+    def __init__(self, path, purge_every=1000):
+        self.path = path
+        self.purge_every = purge_every
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS sessions "
+                         "(sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_expires ON sessions (expires)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, sid):
+        row = self._conn().execute(
+            "SELECT data FROM sessions WHERE sid = ? AND expires > ?", (sid, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, sid, data, ttl):
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)",
+                     (sid, data, time.time() + ttl))
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            conn.execute("DELETE FROM sessions WHERE expires <= ?", (time.time(),))
+
+    def delete(self, sid):
+        self._conn().execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session interface storing data in a backend and a signed id in the cookie.
+
+    Unchanged sessions cost one backend read per request and no write, and the
+    cookie stays the same size however large the cart grows.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt="nsb-server-session")
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            if sid:
+                raw = self.backend.get(sid)
+                if raw is not None:
+                    return ServerSession(self.serializer.loads(raw), sid=sid)
+        return ServerSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            if session.modified and not session.new:
+                self.backend.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if session.modified or session.new:
+            ttl = app.permanent_session_lifetime.total_seconds()
+            self.backend.set(session.sid, self.serializer.dumps(dict(session)), ttl)
+        if session.new or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name, self._signer(app).sign(session.sid).decode(),
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+                domain=domain, path=path,
+            )
+
+def init_sessions(app):
+    """Install the server-side session interface configured by SESSION_* keys."""
+    for key, value in SESSION_DEFAULTS.items():
+        app.config.setdefault(key, value)
+    ttl = app.permanent_session_lifetime.total_seconds()
+    kind = app.config["SESSION_BACKEND"]
+    if kind == "memory":
+        backend = MemoryBackend(app.config["SESSION_MEMORY_MAXSIZE"], ttl)
+    elif kind == "sqlite":
+        path = app.config["SESSION_SQLITE_PATH"] or os.path.join(app.instance_path, "sessions.db")
+        backend = SQLiteBackend(path)
+    else:
+        raise ValueError(f"unknown SESSION_BACKEND {kind!r}")
+    app.session_interface = ServerSideSessionInterface(backend)
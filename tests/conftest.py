@@ -0,0 +1,24 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# importing app builds the module-level app: keep its database and log out of the tree
+_tmp = tempfile.mkdtemp(prefix="nsb-tests-")
+os.environ.setdefault("NESTLE_SMARTBOT_SQLALCHEMY_DATABASE_URI", f"sqlite:///{os.path.join(_tmp, 'app.db')}")
+os.environ.setdefault("NESTLE_SMARTBOT_SESSION_SQLITE_PATH", os.path.join(_tmp, "sessions.db"))
+os.environ.setdefault("NESTLE_SMARTBOT_LOG", os.path.join(_tmp, "test.log"))
+
+@pytest.fixture
+def app(tmp_path):
+    """A fresh app on its own seeded SQLite database."""
+    from app import create_app
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'nsb.db'}",
+                      "SESSION_SQLITE_PATH": str(tmp_path / "sessions.db"),
+                      "DB_AUTO_INIT": True, "TESTING": True})
+    with app.app_context():
+        yield app
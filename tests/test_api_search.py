@@ -0,0 +1,31 @@
+# tests/test_api_search.py
+import pytest
+
+@pytest.mark.parametrize("body", [
+    {"category": 5},
+    {"category": ["milk", 5]},
+    {"category": {"milk": 1}},
+    {"limit": []},
+    {"limit": "x"},
+    {"price_min": {}},
+    {"sort": ["price"]},
+    {"sort": "cheapest"},
+    {"cursor": ["a"]},
+    {"cursor": "garbage"},
+    {"q": 5},
+    ["milo"],
+])
+def test_malformed_search_is_a_400(app, body):
+    r = app.test_client().post("/api/search", json=body)
+    assert r.status_code == 400
+    assert "error" in r.get_json()
+
+def test_well_formed_search_still_works(app):
+    c = app.test_client()
+    r = c.post("/api/search", json={"category": ["milk"], "limit": 2, "sort": "-price", "price_min": "0"})
+    assert r.status_code == 200
+    assert all(p["category"] == "milk" for p in r.get_json()["results"])
+    r = c.post("/api/search", json={"q": "milo", "cursor": 0, "limit": 1})
+    assert r.status_code == 200
+    r = c.get("/api/search?category=milk,beverage&limit=3")
+    assert r.status_code == 200 and len(r.get_json()["results"]) == 3
@@ -0,0 +1,47 @@
+# tests/test_catalog_import.py
+from catalog_import import import_catalog
+from models import db, Product, Promotion
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+def test_price_only_feed_keeps_description_and_nutrition(app, tmp_path):
+    before = db.session.execute(db.select(Product).filter_by(code="NESTLE-BEARBRAND-370")).scalar_one()
+    kept = (before.description, before.calories, before.protein, before.fat, before.carbs)
+    feed = write(tmp_path / "prices.csv",
+                 "code,name,category,price\n"
+                 "NESTLE-BEARBRAND-370,Bear Brand 370ml,milk,13000\n"
+                 "NESTLE-NEW-1,Produk Baru,snack,5000\n")
+    result = import_catalog(feed)
+    assert result.upserted == 2 and not result.errors
+    db.session.expire_all()
+    p = db.session.execute(db.select(Product).filter_by(code="NESTLE-BEARBRAND-370")).scalar_one()
+    assert p.price == 13000
+    assert (p.description, p.calories, p.protein, p.fat, p.carbs) == kept
+    new = db.session.execute(db.select(Product).filter_by(code="NESTLE-NEW-1")).scalar_one()
+    assert new.description is None and new.is_catering_option is False
+
+def test_promotion_feed_without_active_or_discount_keeps_them(app, tmp_path):
+    promo = db.session.execute(db.select(Promotion).filter_by(code="WELCOME10")).scalar_one()
+    promo.active = False
+    db.session.commit()
+    feed = write(tmp_path / "promos.jsonl",
+                 '{"code": "welcome10", "description": "Diskon pembelian pertama"}\n'
+                 '{"code": "NEW5", "discount_percent": 5}\n')
+    assert import_catalog(feed, kind="promotion").upserted == 2
+    db.session.expire_all()
+    promo = db.session.execute(db.select(Promotion).filter_by(code="WELCOME10")).scalar_one()
+    assert promo.description == "Diskon pembelian pertama"
+    assert promo.active is False and promo.discount_percent == 10.0
+    new = db.session.execute(db.select(Promotion).filter_by(code="NEW5")).scalar_one()
+    assert new.active is True and new.discount_percent == 5.0
+
+def test_full_feed_still_updates_every_column(app, tmp_path):
+    feed = write(tmp_path / "full.csv",
+                 "code,name,category,price,description,calories,protein,fat,carbs\n"
+                 "NESTLE-BEARBRAND-370,Bear Brand,milk,12500,Baru,,,,\n")
+    assert import_catalog(feed).upserted == 1
+    db.session.expire_all()
+    p = db.session.execute(db.select(Product).filter_by(code="NESTLE-BEARBRAND-370")).scalar_one()
+    assert (p.description, p.calories, p.carbs) == ("Baru", None, None)
@@ -0,0 +1,25 @@
+# tests/test_order_no.py
+import os
+import pytest
+from utils import HOST_IDS, PID_BITS, OrderNoGenerator, parse_host_id, to_base36
+
+def test_host_ids_fit_the_worker_field():
+    assert HOST_IDS == 518
+    assert (HOST_IDS - 1) << PID_BITS | (2 ** PID_BITS - 1) < 36 ** 6
+
+@pytest.mark.parametrize("value", ["518", "519", "-1", "abc", "1.5", ""])
+def test_invalid_worker_id_is_rejected(value):
+    with pytest.raises(ValueError, match="NESTLE_SMARTBOT_WORKER_ID"):
+        parse_host_id(value)
+
+def test_invalid_worker_id_fails_at_construction(monkeypatch):
+    monkeypatch.setenv("NESTLE_SMARTBOT_WORKER_ID", "519")
+    with pytest.raises(ValueError):
+        OrderNoGenerator()
+
+def test_worker_id_is_used_unwrapped(monkeypatch):
+    monkeypatch.setenv("NESTLE_SMARTBOT_WORKER_ID", "517")
+    gen = OrderNoGenerator()
+    no = gen()
+    assert no[12:18] == to_base36(517 << PID_BITS | os.getpid() % 2 ** PID_BITS, 6)
+    assert len({gen() for _ in range(5000)}) == 5000
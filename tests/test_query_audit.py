@@ -0,0 +1,21 @@
+# tests/test_query_audit.py
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_audit(*extra):
+    return subprocess.run([sys.executable, "query_audit.py", "--products", "200", "--orders", "2000", *extra],
+                          cwd=ROOT, capture_output=True, text=True, timeout=300)
+
+def test_audit_passes_with_every_index():
+    r = run_audit()
+    assert r.returncode == 0, r.stdout[-2000:] + r.stderr[-2000:]
+    assert ", 0 full scans" in r.stdout
+
+def test_audit_fails_when_an_index_is_missing():
+    r = run_audit("--drop-index", "ix_order_item_order_id_fk")
+    assert r.returncode == 1
+    assert "[FULL SCAN]" in r.stdout
+    assert "SCAN order_item" in r.stdout
@@ -1,56 +1,124 @@
 # utils.py
 import os
-import random
+try:
+    import fcntl
+except ImportError:  # non-POSIX: rely on upgrade()'s own race handling
+    fcntl = None
+import socket
 import string
-import difflib
-from datetime import datetime
+import threading
+import time
+import zlib
 from models import db, Product, Promotion
+from catalog import get_catalog
+from applog import log
+from migrations import upgrade, pending
+from nutrition import recommend
 from flask import current_app
 
-DB_SEED_KEY = "nestle_seeded"
+B36 = string.digits + string.ascii_uppercase  # ASCII order, so fixed-width strings sort numerically
 
-def log(msg):
-    ts = datetime.utcnow().isoformat(sep=" ", timespec="seconds")
-    line = f"[{ts}] {msg}\n"
-    log_file = os.environ.get("NESTLE_SMARTBOT_LOG", "nestle_smartbot.log")
-    with open(log_file, "a", encoding="utf-8") as f:
-        f.write(line)
+def to_base36(n, width):
+    out = []
+    for _ in range(width):
+        n, r = divmod(n, 36)
+        out.append(B36[r])
+    return "".join(reversed(out))
 
-def rand_order_no(prefix="NSB"):
-    s = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-    return f"{prefix}{s}"
+# The worker field is <host id><pid>: pids are unique among the live
+# processes of one host, so only the host id has to be assigned per machine.
+PID_BITS = 22  # Linux pid_max is at most 2**22
+HOST_IDS = 36 ** 6 // 2 ** PID_BITS  # 518, host ids 0..517
+
+def parse_host_id(value):
+    """Host id from NESTLE_SMARTBOT_WORKER_ID; ValueError unless an integer in 0..HOST_IDS-1."""
+    try:
+        host = int(value)
+    except (TypeError, ValueError):
+        host = None
+    if host is None or not 0 <= host < HOST_IDS:
+        raise ValueError(f"NESTLE_SMARTBOT_WORKER_ID must be an integer 0..{HOST_IDS - 1}, got {value!r}")
+    return host
+
+class OrderNoGenerator:
+    """Order numbers of the form <prefix><ms:9><worker:6><seq:3>, all base36.
+
+    Needs no DB round-trip, is strictly increasing within a worker (the clock
+    is never allowed to go backwards and the per-ms sequence spills into the
+    next millisecond), unique across workers through the worker id, and sorts
+    lexicographically in creation-time order.
+
+    The worker id combines a host id with the process id, so every forked
+    gunicorn worker gets its own. Without NESTLE_SMARTBOT_WORKER_ID the host
+    id is crc32(hostname) % 518, which two hosts can share; deployments with
+    several hosts on one database must set it to a distinct 0..517 value per
+    host. The variable is read once, when the generator is created, and an
+    invalid value raises ValueError then rather than failing checkouts.
+    """
+
+    def __init__(self, worker_id=None):
+        self._fixed_worker = worker_id
+        env = os.environ.get("NESTLE_SMARTBOT_WORKER_ID", "").strip()
+        self._host = parse_host_id(env) if env else zlib.crc32(socket.gethostname().encode()) % HOST_IDS
+        self._lock = threading.Lock()
+        self._pid = None
+        self._last_ms = 0
+        self._seq = 0
+
+    def _worker_id(self):
+        if self._fixed_worker is not None:
+            return int(self._fixed_worker) % 36 ** 6
+        return self._host << PID_BITS | os.getpid() % 2 ** PID_BITS
+
+    def __call__(self, prefix="NSB"):
+        with self._lock:
+            if self._pid != os.getpid():  # forked worker: new identity, new sequence
+                self._pid = os.getpid()
+                self._worker = to_base36(self._worker_id(), 6)
+                self._seq = 0
+            now = int(time.time() * 1000)
+            if now > self._last_ms:
+                self._last_ms, self._seq = now, 0
+            else:
+                self._seq += 1
+                if self._seq >= 36 ** 3:
+                    self._last_ms, self._seq = self._last_ms + 1, 0
+            return f"{prefix}{to_base36(self._last_ms, 9)}{self._worker}{to_base36(self._seq, 3)}"
+
+new_order_no = OrderNoGenerator()
 
 def fuzzy_search_product(query, n=5, cutoff=0.5):
     if not query:
         return []
-    products = Product.query.all()
-    pool = []
+    catalog = get_catalog()
     q = query.lower()
-    for p in products:
-        pool.append((p.name.lower(), p))
-        pool.append((p.code.lower(), p))
-    names = [t[0] for t in pool]
-    matches = difflib.get_close_matches(q, names, n=n, cutoff=cutoff)
     seen = set()
     results = []
-    for m in matches:
-        for name, prod in pool:
-            if name == m and prod.id not in seen:
-                results.append(prod)
-                seen.add(prod.id)
-    # fallback: substring
+    def take(index, kids):
+        for kid in kids:
+            for prod in index.items[kid]:
+                if prod.id not in seen:
+                    results.append(prod)
+                    seen.add(prod.id)
+    take(catalog.name_index, catalog.name_index.close_matches(q, n=n, cutoff=cutoff))
+    # fallback: substring on name/code, then description
     if not results:
-        for name, prod in pool:
-            if q in name and prod.id not in seen:
-                results.append(prod)
-                seen.add(prod.id)
+        take(catalog.name_index, catalog.name_index.substring(q))
+        take(catalog.text_index, catalog.text_index.substring(q))
     return results[:n]
 
 def compute_subtotal_from_cart(cart):
+    """Price a cart ({product_id: qty}, int or str keys) in one catalog pass.
+
+    Returns (subtotal, details) where each detail is
+    {"product": ProductRecord, "qty": int, "line": int}. Unknown ids are skipped.
+    This is the only place cart lines are priced; API and chat views build on it.
+    """
+    catalog = get_catalog()
     subtotal = 0
     details = []
     for pid, qty in cart.items():
-        prod = Product.query.get(pid)
+        prod = catalog.get(pid)
         if not prod:
             continue
         line = int(prod.price) * int(qty)
@@ -58,18 +126,19 @@ def compute_subtotal_from_cart(cart):
         details.append({"product": prod, "qty": int(qty), "line": line})
     return subtotal, details
 
+def evaluate_promotion(promo_code, subtotal, is_catering=False, pax=0, delivery_fee=0):
+    """PromoResult for one code from the in-memory rule table (no DB hit), or None."""
+    return get_catalog().promotions.evaluate(promo_code, subtotal, is_catering, pax, delivery_fee)
+
+def best_promotion(subtotal, is_catering=False, pax=0, delivery_fee=0):
+    """Most valuable applicable promotion for a cart, or None."""
+    return get_catalog().promotions.best(subtotal, is_catering, pax, delivery_fee)
+
 def apply_promotion(subtotal, promo_code=None, is_catering=False, pax=0):
-    discount = 0
-    applied = None
-    if promo_code:
-        promo = Promotion.query.filter_by(code=promo_code.upper(), active=True).first()
-        if promo and subtotal >= (promo.min_subtotal or 0):
-            if promo.code == "CATER5" and (not is_catering or (pax and pax < 50)):
-                applied = None
-            else:
-                discount = int(subtotal * (promo.discount_percent / 100.0))
-                applied = promo
-    return discount, applied
+    res = evaluate_promotion(promo_code, subtotal, is_catering=is_catering, pax=pax)
+    if res is None:
+        return 0, None
+    return res.discount, res.rule
 
 def compute_tax(subtotal):
     return int(round(subtotal * 0.11))
@@ -80,47 +149,40 @@ def compute_delivery_fee(subtotal, has_location=False):
     return 10000 if has_location else 15000
 
 def nutrition_advice(age=None, goal=None):
-    advice = []
-    recs = []
     try:
         age_i = int(age) if age else None
     except:
         age_i = None
     g = (goal or "").lower()
+    return recommend(get_catalog().nutrition, age=age_i, goal=g)
+
+def init_database(app, force=False):
+    """Bring the schema up to date and seed an empty database, once across workers.
 
-    if age_i and age_i < 2:
-        advice.append("Untuk bayi di bawah 2 tahun, utamakan ASI dan konsultasi dokter.")
-        recs += Product.query.filter(Product.category == "baby").limit(3).all()
-    elif age_i and age_i < 12:
-        advice.append("Anak memerlukan nutrisi seimbang: karbohidrat, protein, lemak sehat.")
-        recs += Product.query.filter(Product.category.in_(["milk","baby"])).limit(3).all()
-    else:
-        if g == "weight_loss":
-            advice.append("Kurangi gula/lemak, pilih porsi kecil, tambah protein & serat.")
-            recs += Product.query.filter(Product.calories <= 200).limit(3).all()
-        elif g == "weight_gain":
-            advice.append("Tambah asupan kalori berkualitas & protein.")
-            recs += Product.query.filter(Product.calories >= 300).limit(3).all()
-        elif g in ("maintenance", ""):
-            advice.append("Seimbangkan porsi, olahraga teratur.")
-            recs += Product.query.limit(3).all()
-        elif g == "lactating":
-            advice.append("Ibu menyusui butuh ekstra kalori dan cairan.")
-            recs += Product.query.filter(Product.category.in_(["milk"])).limit(3).all()
-        else:
-            advice.append("Konsultasikan kebutuhan spesifik dengan ahli gizi.")
-    recs_unique = []
-    ids = set()
-    for r in recs:
-        if r.id not in ids:
-            recs_unique.append(r)
-            ids.add(r.id)
-    return "\n".join(advice), recs_unique[:5]
+    Workers serialize on <instance>/db-init.lock; whoever gets there first does
+    the work and the rest find nothing pending after a single SELECT, so a
+    warm worker boot costs no create_all() and no seed count() queries.
+    Returns the migration versions applied by this call.
+    """
+    os.makedirs(app.instance_path, exist_ok=True)
+    with open(os.path.join(app.instance_path, "db-init.lock"), "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with app.app_context():
+                if not force and not pending():
+                    return []
+                applied = upgrade()
+                seed_products_and_promos(app)
+                return applied
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
 
 def seed_products_and_promos(app):
-    """Create tables and seed demo data. Safe to call multiple times."""
+    """Create/upgrade tables and seed demo data. Safe to call multiple times."""
     with app.app_context():
-        db.create_all()
+        upgrade()
         # Prevent reseeding if already seeded
         if Promotion.query.count() > 0 or Product.query.count() > 0:
             log("Seed: existing data found, skipping reseed.")
@@ -141,11 +203,13 @@ def seed_products_and_promos(app):
                            is_catering_option=(cat == "catering"))
             db.session.add(prod)
         promos = [
-            ("WELCOME10", "Diskon 10% untuk pembelian pertama", 10.0, 0),
-            ("CATER5", "Diskon 5% untuk catering >= 50 pax", 5.0, 0),
-            ("FREESHIP50", "Gratis ongkir untuk subtotal >= 50k", 0.0, 50000),
+            ("WELCOME10", "Diskon 10% untuk pembelian pertama", 10.0, 0, False, None, False),
+            ("CATER5", "Diskon 5% untuk catering >= 50 pax", 5.0, 0, True, 50, False),
+            ("FREESHIP50", "Gratis ongkir untuk subtotal >= 50k", 0.0, 50000, False, None, True),
         ]
-        for code, desc, pct, min_sub in promos:
-            db.session.add(Promotion(code=code, description=desc, discount_percent=pct, min_subtotal=min_sub, active=True))
+        for code, desc, pct, min_sub, catering_only, min_pax, free_ship in promos:
+            db.session.add(Promotion(code=code, description=desc, discount_percent=pct, min_subtotal=min_sub,
+                                     catering_only=catering_only, min_pax=min_pax, free_shipping=free_ship,
+                                     active=True))
         db.session.commit()
         log("Database seeded with products and promotions.")